@@ -0,0 +1,43 @@
+"""call config snapshots
+
+Revision ID: 1f3b7c2d9e41
+Revises: c3100f485556
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '1f3b7c2d9e41'
+down_revision: Union[str, None] = 'c3100f485556'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('call_config',
+    sa.Column('id', sa.Text(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('telephony_service_config', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('transcriber_config', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('agent_config', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('synthesizer_config', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('current_timestamp_utc()'), nullable=True),
+    sa.Column('created_by', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('current_timestamp_utc()'), nullable=True),
+    sa.Column('updated_by', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('call', sa.Column('call_config_id', sa.Text(), nullable=True))
+    op.create_foreign_key('call_call_config_id_fkey', 'call', 'call_config', ['call_config_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('call_call_config_id_fkey', 'call', type_='foreignkey')
+    op.drop_column('call', 'call_config_id')
+    op.drop_table('call_config')
@@ -0,0 +1,117 @@
+"""move call configs into call_config
+
+Revision ID: 8a4d2e6f1c57
+Revises: 1f3b7c2d9e41
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d2e6f1c57'
+down_revision: Union[str, None] = '1f3b7c2d9e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match jobs.call_config.CALL_CONFIG_VERSION / compute_call_config_id at this revision
+CALL_CONFIG_VERSION = 1
+
+CALL_CONFIG_FIELDS = (
+    'telephony_service_config',
+    'transcriber_config',
+    'agent_config',
+    'synthesizer_config',
+)
+
+INSERT_BATCH_SIZE = 1000
+
+
+def compute_call_config_id(content: dict) -> str:
+    payload = json.dumps(
+        {'version': CALL_CONFIG_VERSION, **content},
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    # Every distinct combination of configs becomes one call_config row. Ids are hashed
+    # here rather than in SQL, as they must match compute_call_config_id for new calls.
+    configs = connection.execute(sa.text(
+        'SELECT telephony_service_config, transcriber_config, agent_config, synthesizer_config, '
+        'min(created_by) AS created_by '
+        'FROM "call" WHERE call_config_id IS NULL '
+        'GROUP BY telephony_service_config, transcriber_config, agent_config, synthesizer_config'
+    )).mappings().all()
+    rows = []
+    for config in configs:
+        content = {field: config[field] for field in CALL_CONFIG_FIELDS}
+        rows.append({
+            'id': compute_call_config_id(content),
+            'version': CALL_CONFIG_VERSION,
+            'created_by': config['created_by'],
+            'updated_by': config['created_by'],
+            **content,
+        })
+
+    call_config = sa.table(
+        'call_config',
+        sa.column('id', sa.Text()),
+        sa.column('version', sa.Integer()),
+        *[sa.column(field, postgresql.JSONB()) for field in CALL_CONFIG_FIELDS],
+        sa.column('created_by', sa.Text()),
+        sa.column('updated_by', sa.Text()),
+    )
+    # Multi-row INSERTs, kept under the 32767 bind parameters of a statement
+    for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+        connection.execute(
+            postgresql.insert(call_config)
+            .values(rows[offset:offset + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=['id'])
+        )
+
+    # A single pass over "call", joined to its config by content
+    if rows:
+        connection.execute(
+            sa.text(
+                'UPDATE "call" c SET call_config_id = cc.id FROM call_config cc '
+                'WHERE c.call_config_id IS NULL AND cc.id IN :ids '
+                'AND c.telephony_service_config = cc.telephony_service_config '
+                'AND c.transcriber_config = cc.transcriber_config '
+                'AND c.agent_config = cc.agent_config '
+                'AND c.synthesizer_config = cc.synthesizer_config'
+            ).bindparams(sa.bindparam('ids', expanding=True)),
+            {'ids': [row['id'] for row in rows]},
+        )
+
+    op.alter_column('call', 'call_config_id', existing_type=sa.Text(), nullable=False)
+    op.create_index(op.f('ix_call_call_config_id'), 'call', ['call_config_id'], unique=False)
+    for field in CALL_CONFIG_FIELDS:
+        op.drop_column('call', field)
+
+
+def downgrade() -> None:
+    for field in CALL_CONFIG_FIELDS:
+        op.add_column('call', sa.Column(field, postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.execute(
+        'UPDATE "call" SET '
+        'telephony_service_config = call_config.telephony_service_config, '
+        'transcriber_config = call_config.transcriber_config, '
+        'agent_config = call_config.agent_config, '
+        'synthesizer_config = call_config.synthesizer_config '
+        'FROM call_config WHERE "call".call_config_id = call_config.id'
+    )
+    for field in CALL_CONFIG_FIELDS:
+        op.alter_column('call', field, existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False)
+    op.drop_index(op.f('ix_call_call_config_id'), table_name='call')
+    op.alter_column('call', 'call_config_id', existing_type=sa.Text(), nullable=True)
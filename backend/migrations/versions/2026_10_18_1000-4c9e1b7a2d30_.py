@@ -0,0 +1,26 @@
+"""customer set ingestion progress
+
+Revision ID: 4c9e1b7a2d30
+Revises: 8a4d2e6f1c57
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c9e1b7a2d30'
+down_revision: Union[str, None] = '8a4d2e6f1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customer_set', sa.Column('processed_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('customer_set', 'processed_count')
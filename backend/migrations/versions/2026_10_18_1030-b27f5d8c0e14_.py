@@ -0,0 +1,30 @@
+"""customer set ingestion counters and error file
+
+Revision ID: b27f5d8c0e14
+Revises: 4c9e1b7a2d30
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b27f5d8c0e14'
+down_revision: Union[str, None] = '4c9e1b7a2d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('customer_set', sa.Column('total_count', sa.Integer(), nullable=True))
+    op.add_column('customer_set', sa.Column('failed_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('customer_set', sa.Column('error_url', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('customer_set', 'error_url')
+    op.drop_column('customer_set', 'failed_count')
+    op.drop_column('customer_set', 'total_count')
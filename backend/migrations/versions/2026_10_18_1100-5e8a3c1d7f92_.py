@@ -0,0 +1,48 @@
+"""keyset pagination indexes
+
+Revision ID: 5e8a3c1d7f92
+Revises: b27f5d8c0e14
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a3c1d7f92'
+down_revision: Union[str, None] = 'b27f5d8c0e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, leading column)
+PAGINATION_INDEXES = (
+    ('ix_call_organization_id_created_at_id', 'call', 'organization_id'),
+    ('ix_campaign_organization_id_created_at_id', 'campaign', 'organization_id'),
+    ('ix_customer_set_organization_id_created_at_id', 'customer_set', 'organization_id'),
+    ('ix_customer_organization_id_created_at_id', 'customer', 'organization_id'),
+    ('ix_customer_customer_set_id_created_at_id', 'customer', 'customer_set_id'),
+)
+
+
+def upgrade() -> None:
+    # Built concurrently so the call and customer tables stay writable meanwhile
+    with op.get_context().autocommit_block():
+        for index, table, column in PAGINATION_INDEXES:
+            op.create_index(
+                index,
+                table,
+                [column, sa.text('created_at DESC'), sa.text('id DESC')],
+                unique=False,
+                postgresql_where=sa.text('deleted_at IS NULL'),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index, table, column in PAGINATION_INDEXES:
+            op.drop_index(index, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,56 @@
+"""call search indexes
+
+Revision ID: 9c2f6a4b8d13
+Revises: 5e8a3c1d7f92
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2f6a4b8d13'
+down_revision: Union[str, None] = '5e8a3c1d7f92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, columns, access method), must match models.Call
+CALL_SEARCH_INDEXES = (
+    (
+        'ix_call_organization_id_campaign_id_created_at_id',
+        ['organization_id', 'campaign_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        None,
+    ),
+    (
+        'ix_call_organization_id_status_created_at_id',
+        ['organization_id', 'status', sa.text('created_at DESC'), sa.text('id DESC')],
+        None,
+    ),
+    ('ix_call_organization_id_to_number', ['organization_id', 'to_number'], None),
+    ('ix_call_transcript_search', [sa.text("to_tsvector('simple'::regconfig, transcript)")], 'gin'),
+)
+
+
+def upgrade() -> None:
+    # Built concurrently so calls can still be written meanwhile
+    with op.get_context().autocommit_block():
+        for index, columns, using in CALL_SEARCH_INDEXES:
+            op.create_index(
+                index,
+                'call',
+                columns,
+                unique=False,
+                postgresql_using=using,
+                postgresql_where=sa.text('deleted_at IS NULL'),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index, columns, using in CALL_SEARCH_INDEXES:
+            op.drop_index(index, table_name='call', postgresql_concurrently=True, if_exists=True)
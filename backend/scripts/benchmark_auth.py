@@ -0,0 +1,83 @@
+"""Measure the per-request cost of authenticating a user, with and without the cache of
+verified tokens, for requests from a number of concurrent users.
+
+    python scripts/benchmark_auth.py --requests 20000 --users 100 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+
+import jwt  # noqa: E402
+
+from auth import auth  # noqa: E402
+from constants import UserRole  # noqa: E402
+
+
+def create_tokens(users: int) -> list[str]:
+    expires_at = int(time.time()) + 3600
+    return [
+        jwt.encode(
+            {
+                "sub": f"user-{index}",
+                "aud": "authenticated",
+                "exp": expires_at,
+                "user_metadata": {"organization_id": "benchmark", "role": UserRole.ADMIN.value},
+            },
+            os.environ["SUPABASE_JWT_SECRET"],
+            algorithm="HS256",
+        )
+        for index in range(users)
+    ]
+
+
+async def authenticate(auth_header: str):
+    current_user = await auth.get_current_user(auth_header)
+    await auth.get_current_admin_user(current_user)
+
+
+async def measure(name: str, tokens: list[str], requests: int, concurrency: int, cached: bool):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed_request(index: int):
+        auth_header = f"Bearer {tokens[index % len(tokens)]}"
+        async with semaphore:
+            if not cached:
+                auth._verified_tokens.clear()
+            started_at = time.perf_counter()
+            await authenticate(auth_header)
+            latencies.append((time.perf_counter() - started_at) * 1_000_000)
+
+    auth._verified_tokens.clear()
+    started_at = time.perf_counter()
+    await asyncio.gather(*[timed_request(index) for index in range(requests)])
+    duration = time.perf_counter() - started_at
+    latencies.sort()
+    print(
+        f"{name}: {requests / duration:.0f} requests/s, "
+        f"p50={statistics.median(latencies):.1f}us p99={latencies[int(len(latencies) * 0.99) - 1]:.1f}us"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    tokens = create_tokens(args.users)
+    await measure("decode every request", tokens, args.requests, args.concurrency, cached=False)
+    await measure("cached tokens", tokens, args.requests, args.concurrency, cached=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Compare loading a page of calls as full rows with loading the ListCallsResponse
+projection, against the configured database: bytes read from Postgres for the page and
+time to build the response.
+
+Bytes are the sum of pg_column_size over the selected rows, which is what Postgres
+sends before protocol overhead.
+
+    python scripts/benchmark_call_list.py --organization-id <organization_id> --limit 500
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import desc, func, literal_column, select  # noqa: E402
+
+from models import AsyncDBSession, Call  # noqa: E402
+from repositories import CallRepository  # noqa: E402
+from schemas import CallSearchFilters, ListCallsResponse  # noqa: E402
+
+
+async def page_bytes(db, organization_id: str, limit: int, columns) -> int:
+    page = (
+        select(*columns)
+        .where(Call.organization_id == organization_id, Call.deleted_at == None)  # noqa: E711
+        .order_by(desc(Call.created_at), desc(Call.id))
+        .limit(limit)
+        .subquery("page")
+    )
+    result = await db.execute(
+        select(func.sum(func.pg_column_size(literal_column("page.*")))).select_from(page)
+    )
+    return result.scalar() or 0
+
+
+async def measure(name: str, list_page, repeat: int, size: int):
+    latencies = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        await list_page()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    latencies.sort()
+    print(
+        f"{name}: {size / 1024:.1f} KiB, "
+        f"p50={statistics.median(latencies):.2f}ms p95={latencies[int(len(latencies) * 0.95) - 1]:.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--organization-id", required=True)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    filters = CallSearchFilters()
+    async with AsyncDBSession() as db:
+        repository = CallRepository(db)
+        projected_columns = repository._projection_columns(
+            ListCallsResponse, Call.id, Call.created_at
+        )
+
+        async def full_rows():
+            page = await repository.search(args.organization_id, filters, limit=args.limit)
+            [ListCallsResponse(**item.dict()) for item in page.entries]
+            db.expunge_all()
+
+        async def projected_rows():
+            await repository.search(
+                args.organization_id, filters, limit=args.limit, projection=ListCallsResponse
+            )
+
+        full_size = await page_bytes(db, args.organization_id, args.limit, Call.__table__.columns)
+        projected_size = await page_bytes(db, args.organization_id, args.limit, projected_columns)
+        await measure("full rows", full_rows, args.repeat, full_size)
+        await measure("projection", projected_rows, args.repeat, projected_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""Compare calls created per second when materializing a campaign's calls one row at a
+time, as execute_campaign used to (CallRepository.create and one apply_async per call),
+with multi-row INSERT ... RETURNING id per batch and one celery group per batch. The
+batched inserts are also measured alone, as execute_campaign now only creates the calls
+and hands them to the campaign dialer.
+
+Runs against the configured database with the customers of the given campaign. Tasks
+are published to --broker-url, an in-memory broker by default, under the name of
+make_outbound_call_task so nothing consumes them. Calls created by the benchmark are
+deleted after each run.
+
+    python scripts/benchmark_campaign_calls.py --campaign-id <campaign_id> --customers 5000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from celery import Celery, group  # noqa: E402
+
+from config import CALL_CREATION_BATCH_SIZE  # noqa: E402
+from jobs.call import build_campaign_call, get_campaign_customer_batches  # noqa: E402
+from jobs.call_config import resolve_campaign_call_config, save_call_config  # noqa: E402
+from models import AsyncDBSession, Call  # noqa: E402
+from repositories import CallRepository, CampaignRepository  # noqa: E402
+from util.iterables import batched  # noqa: E402
+
+
+async def create_per_row(db, inputs: list, task, batch_size: int) -> list:
+    call_ids = []
+    for call_input in inputs:
+        call = await CallRepository(db).create(call_input)
+        task.apply_async((call.id,))
+        call_ids.append(call.id)
+    return call_ids
+
+
+async def create_in_batches(db, inputs: list, task, batch_size: int) -> list:
+    call_ids = []
+    for inputs_batch in batched(inputs, batch_size):
+        result = await CallRepository(db).bulk_create(inputs_batch, returning=[Call.id])
+        batch_ids = result.scalars().all()
+        group(task.s(call_id) for call_id in batch_ids).apply_async()
+        call_ids.extend(batch_ids)
+    return call_ids
+
+
+async def create_in_batches_without_tasks(db, inputs: list, task, batch_size: int) -> list:
+    call_ids = []
+    for inputs_batch in batched(inputs, batch_size):
+        result = await CallRepository(db).bulk_create(inputs_batch, returning=[Call.id])
+        call_ids.extend(result.scalars().all())
+    return call_ids
+
+
+async def measure(name: str, create, inputs: list, task, batch_size: int) -> float:
+    async with AsyncDBSession() as db:
+        started_at = time.perf_counter()
+        call_ids = await create(db, inputs, task, batch_size)
+        duration = time.perf_counter() - started_at
+        assert len(call_ids) == len(inputs)
+        for ids_batch in batched(call_ids, batch_size):
+            await CallRepository(db).delete(
+                where=[Call.id.in_(ids_batch)], permanent_operation=True
+            )
+
+    calls_per_second = len(inputs) / duration
+    print(f"{name}: {len(inputs)} calls in {duration:.2f}s, {calls_per_second:.0f} calls/s")
+    return calls_per_second
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campaign-id", required=True)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=CALL_CREATION_BATCH_SIZE)
+    parser.add_argument("--broker-url", default="memory://")
+    args = parser.parse_args()
+
+    app = Celery("benchmark_campaign_calls", broker=args.broker_url)
+
+    @app.task(name="make_outbound_call_task")
+    def task(call_id: str):
+        pass
+
+    async with AsyncDBSession() as db:
+        campaign = await CampaignRepository(db).get(id=args.campaign_id)
+        resolved = await resolve_campaign_call_config(db, campaign, campaign.updated_by)
+        await save_call_config(db, resolved.call_config)
+        customers = [
+            customer
+            async for customers_batch in get_campaign_customer_batches(db, campaign)
+            for customer in customers_batch
+        ][: args.customers]
+    inputs = [
+        build_campaign_call(campaign, resolved, customer, campaign.updated_by)
+        for customer in customers
+    ]
+
+    per_row = await measure("per row + apply_async", create_per_row, inputs, task, args.batch_size)
+    batched_rate = await measure(
+        f"bulk_create + group, batches of {args.batch_size}",
+        create_in_batches,
+        inputs,
+        task,
+        args.batch_size,
+    )
+    print(f"speedup: {batched_rate / per_row:.1f}x")
+    await measure(
+        "bulk_create only, no per-call tasks",
+        create_in_batches_without_tasks,
+        inputs,
+        task,
+        args.batch_size,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
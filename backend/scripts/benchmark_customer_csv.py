@@ -0,0 +1,102 @@
+"""Compare sequential and process pool parsing of a synthetic customer set CSV.
+
+    python scripts/benchmark_customer_csv.py --rows 2000000 --workers 8
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from util.customer_csv import (  # noqa: E402
+    parse_csv_range,
+    parse_customer_rows,
+    read_csv_chunks,
+    split_csv_file,
+)
+
+
+def write_synthetic_csv(file, rows: int):
+    text_file = open(file.name, "w", newline="")
+    writer = csv.writer(text_file)
+    writer.writerow(["name", "mobile_number", "company", "notes"])
+    for i in range(rows):
+        writer.writerow(
+            [
+                f"Customer {i}",
+                f"+91 9{i % 900000000:09d}",
+                f"Company {i % 1000}",
+                'Prefers "evening" calls,\nspeaks Hindi' if i % 50 == 0 else "",
+            ]
+        )
+    text_file.close()
+
+
+def parse_sequential(path: str, chunk_size: int) -> tuple[int, int, int]:
+    rows = customers = errors = 0
+    with open(path, "rb") as file:
+        for chunk in read_csv_chunks(file, chunk_size):
+            parsed = parse_customer_rows(chunk)
+            rows += parsed.row_count
+            customers += len(parsed.customers)
+            errors += len(parsed.errors)
+    return rows, customers, errors
+
+
+def parse_parallel(path: str, workers: int, range_size: int) -> tuple[int, int, int]:
+    rows = customers = errors = 0
+    with open(path, "rb") as file:
+        fieldnames, ranges = split_csv_file(file, range_size)
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(parse_csv_range, path, start, end, fieldnames) for start, end in ranges
+        ]
+        for future in futures:
+            parsed = future.result()
+            rows += parsed.row_count
+            customers += len(parsed.customers)
+            errors += len(parsed.errors)
+    return rows, customers, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--range-size", type=int, default=4 * 1024 * 1024)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".csv") as file:
+        started_at = time.perf_counter()
+        write_synthetic_csv(file, args.rows)
+        size_mb = os.path.getsize(file.name) / 1024 / 1024
+        print(
+            f"Generated {args.rows} rows ({size_mb:.1f} MB) in {time.perf_counter() - started_at:.1f}s"
+        )
+
+        started_at = time.perf_counter()
+        sequential = parse_sequential(file.name, args.chunk_size)
+        sequential_duration = time.perf_counter() - started_at
+        print(f"sequential: {sequential_duration:.2f}s rows/customers/errors={sequential}")
+
+        started_at = time.perf_counter()
+        parallel = parse_parallel(file.name, args.workers, args.range_size)
+        parallel_duration = time.perf_counter() - started_at
+        print(
+            f"parallel ({args.workers} workers): {parallel_duration:.2f}s "
+            f"rows/customers/errors={parallel} speedup={sequential_duration / parallel_duration:.1f}x"
+        )
+
+        # Dedupe within a chunk or range depends on its boundaries, so only rows and
+        # errors have to match exactly
+        assert sequential[0] == parallel[0] and sequential[2] == parallel[2]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Replay Exotel media WebSocket traffic through the inbound message decoding, comparing
+json.loads + base64 as the conversation used to decode with decode_exotel_message.
+
+A recording holds one WebSocket text message per line, as received from Exotel.
+Without one, a call is synthesized: a start message, then 20ms media frames at 8kHz
+LINEAR16, a mark every 10 frames, and a stop message.
+
+    python scripts/benchmark_exotel_decoding.py --recording call.jsonl --repeat 20
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from streaming.telephony.exotel_messages import (  # noqa: E402
+    ExotelMediaFrame,
+    decode_exotel_message,
+)
+
+FRAME_MS = 20
+FRAME_BYTES = 320
+
+
+def synthesize_call(frames: int) -> list[str]:
+    stream_sid = uuid.uuid4().hex
+    messages = [
+        json.dumps(
+            {
+                "event": "start",
+                "sequence_number": 1,
+                "stream_sid": stream_sid,
+                "start": {"stream_sid": stream_sid, "media_format": {"encoding": "raw/slin"}},
+            }
+        )
+    ]
+    for index in range(frames):
+        messages.append(
+            json.dumps(
+                {
+                    "event": "media",
+                    "sequence_number": len(messages) + 1,
+                    "stream_sid": stream_sid,
+                    "media": {
+                        "chunk": index + 1,
+                        "timestamp": str(index * FRAME_MS),
+                        "payload": base64.b64encode(os.urandom(FRAME_BYTES)).decode(),
+                    },
+                }
+            )
+        )
+        if index % 10 == 9:
+            messages.append(
+                json.dumps(
+                    {
+                        "event": "mark",
+                        "sequence_number": len(messages) + 1,
+                        "stream_sid": stream_sid,
+                        "mark": {"name": str(uuid.uuid4())},
+                    }
+                )
+            )
+    messages.append(json.dumps({"event": "stop", "sequence_number": len(messages) + 1}))
+    return messages
+
+
+def decode_with_json(message: str):
+    data = json.loads(message)
+    if data["event"] == "media":
+        media = data["media"]
+        return base64.b64decode(media["payload"]), int(media["timestamp"])
+    return data
+
+
+def decode_with_decoder(message: str):
+    data = decode_exotel_message(message)
+    if isinstance(data, ExotelMediaFrame):
+        return data.chunk, data.timestamp
+    return data
+
+
+def measure(name: str, decode, messages: list[str], repeat: int):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            decode(message)
+    duration = time.perf_counter() - started_at
+    count = len(messages) * repeat
+    print(
+        f"{name}: {count / duration:.0f} messages/s, "
+        f"{duration / count * 1_000_000:.2f}us/message"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recording")
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.recording:
+        with open(args.recording) as file:
+            messages = [line.rstrip("\n") for line in file if line.strip()]
+    else:
+        messages = synthesize_call(args.frames)
+
+    for message in messages:
+        assert decode_with_json(message) == decode_with_decoder(message)
+    media_count = sum(
+        1 for message in messages if isinstance(decode_exotel_message(message), ExotelMediaFrame)
+    )
+    print(f"Replaying {len(messages)} messages, {media_count} media")
+    measure("json.loads + base64", decode_with_json, messages, args.repeat)
+    measure("decode_exotel_message", decode_with_decoder, messages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
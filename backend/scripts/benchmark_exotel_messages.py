@@ -0,0 +1,70 @@
+"""Measure outbound Exotel media frames encoded per second on one core: building and
+dumping dicts per message, as the output device used to, against ExotelMessageEncoder.
+Each frame is a media message followed by its mark message.
+
+    python scripts/benchmark_exotel_messages.py --frame-ms 100 --frames 50000
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from streaming.telephony.exotel_messages import ExotelMessageEncoder  # noqa: E402
+
+# 8kHz LINEAR16
+BYTES_PER_MS = 16
+
+
+def encode_with_dicts(stream_sid: str, chunk: bytes, chunk_id: str) -> tuple[str, str]:
+    media_message = {
+        "event": "media",
+        "stream_sid": stream_sid,
+        "media": {"payload": base64.b64encode(chunk).decode("utf-8")},
+    }
+    mark_message = {"event": "mark", "stream_sid": stream_sid, "mark": {"name": chunk_id}}
+    return json.dumps(media_message), json.dumps(mark_message)
+
+
+def measure(name: str, encode, frames: int, chunk: bytes, chunk_ids: list[str]):
+    started_at = time.perf_counter()
+    for index in range(frames):
+        encode(chunk, chunk_ids[index % len(chunk_ids)])
+    duration = time.perf_counter() - started_at
+    print(f"{name}: {frames / duration:.0f} frames/s, {duration / frames * 1_000_000:.2f}us/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=50000)
+    args = parser.parse_args()
+
+    stream_sid = uuid.uuid4().hex
+    chunk = os.urandom(args.frame_ms * BYTES_PER_MS)
+    chunk_ids = [str(uuid.uuid4()) for _ in range(100)]
+    encoder = ExotelMessageEncoder(stream_sid)
+
+    def encode_with_encoder(chunk: bytes, chunk_id: str):
+        return encoder.media(chunk), encoder.mark(chunk_id)
+
+    assert [json.loads(message) for message in encode_with_encoder(chunk, chunk_ids[0])] == [
+        json.loads(message) for message in encode_with_dicts(stream_sid, chunk, chunk_ids[0])
+    ]
+    measure(
+        "dicts + json.dumps",
+        lambda chunk, chunk_id: encode_with_dicts(stream_sid, chunk, chunk_id),
+        args.frames,
+        chunk,
+        chunk_ids,
+    )
+    measure("ExotelMessageEncoder", encode_with_encoder, args.frames, chunk, chunk_ids)
+
+
+if __name__ == "__main__":
+    main()
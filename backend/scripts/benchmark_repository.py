@@ -0,0 +1,63 @@
+"""Compare the generic by-id get/update of BaseRepository with the cached Core
+statement fast paths, against the configured database, in sequential ops/sec.
+
+The update writes a call's current `updated_by` back, so the row is left unchanged.
+
+    python scripts/benchmark_repository.py --call-id <call_id> --operations 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from models import AsyncDBSession  # noqa: E402
+from repositories import CallRepository  # noqa: E402
+
+
+async def measure(name: str, operation, operations: int):
+    await operation()
+    started_at = time.perf_counter()
+    for _ in range(operations):
+        await operation()
+    duration = time.perf_counter() - started_at
+    print(
+        f"{name}: {operations / duration:.0f} ops/s, {duration / operations * 1_000_000:.0f}us/op"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--call-id", required=True)
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+
+    async with AsyncDBSession() as db:
+        repository = CallRepository(db)
+        call = await repository.get(id=args.call_id)
+        values = {"updated_by": call.updated_by}
+
+        async def get():
+            await repository.get(id=call.id, organization_id=call.organization_id)
+            db.expunge_all()
+
+        async def get_by_id():
+            await repository.get_by_id(call.id, organization_id=call.organization_id)
+
+        async def update():
+            await repository.update(values=values, id=call.id)
+
+        async def update_by_id():
+            await repository.update_by_id(call.id, values)
+
+        await measure("get", get, args.operations)
+        await measure("get_by_id", get_by_id, args.operations)
+        await measure("update", update, args.operations)
+        await measure("update_by_id", update_by_id, args.operations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""Check streaming.utils.transcoding against audioop and measure its throughput.
+
+The mulaw conversions are compared with audioop over every possible input and must be
+identical. Resampling is not compared sample for sample, since audioop.ratecv
+interpolates linearly without filtering; instead resampling a stream in random chunks,
+which may split a sample, must match resampling it at once, tones below the lower
+Nyquist frequency must keep their frequency and level, and tones above it must be
+filtered out.
+
+Throughput is in seconds of 8kHz audio, or of audio at the source rate when
+resampling, converted per second of CPU in 100ms chunks.
+
+    python scripts/benchmark_transcoding.py --seconds 600
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from streaming.utils.transcoding import (  # noqa: E402
+    SUPPORTED_SAMPLING_RATES,
+    Resampler,
+    linear16_to_ulaw,
+    ulaw_to_linear16,
+)
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        # Removed in Python 3.13
+        audioop = None
+
+
+def tone(rate: int, seconds: float, frequency: float, amplitude: float) -> np.ndarray:
+    return amplitude * np.sin(2 * np.pi * frequency * np.arange(int(rate * seconds)) / rate)
+
+
+def level_at(samples: np.ndarray, rate: int, frequency: float) -> float:
+    spectrum = np.abs(np.fft.rfft(samples)) * 2 / len(samples)
+    return spectrum[int(round(frequency * len(samples) / rate))]
+
+
+def check_mulaw():
+    ulaw = bytes(range(256))
+    linear = np.arange(-32768, 32768, dtype="<i2").tobytes()
+    assert ulaw_to_linear16(ulaw) == audioop.ulaw2lin(ulaw, 2)
+    assert linear16_to_ulaw(linear) == audioop.lin2ulaw(linear, 2)
+    print("mulaw <-> linear16: identical to audioop for every input")
+
+
+def check_resampling(rng: random.Random):
+    for from_rate in SUPPORTED_SAMPLING_RATES:
+        for to_rate in SUPPORTED_SAMPLING_RATES:
+            if from_rate == to_rate:
+                continue
+            nyquist = min(from_rate, to_rate) / 2
+            passed, stopped = nyquist * 0.4, nyquist * 1.2
+            samples = tone(from_rate, 2, passed, 8000)
+            if stopped < from_rate / 2:
+                samples += tone(from_rate, 2, stopped, 8000)
+            chunk = samples.astype("<i2").tobytes()
+
+            whole = Resampler(from_rate, to_rate).process(chunk)
+            resampler = Resampler(from_rate, to_rate)
+            parts = []
+            offset = 0
+            while offset < len(chunk):
+                # Odd sizes too, splitting samples across chunks
+                size = rng.randint(1, 4000)
+                parts.append(resampler.process(chunk[offset : offset + size]))
+                offset += size
+            assert b"".join(parts) == whole, f"{from_rate} -> {to_rate}: chunked output differs"
+            assert len(whole) == len(chunk) * to_rate // from_rate
+
+            # One second past the filter's warm-up
+            output = np.frombuffer(whole, dtype="<i2")[to_rate // 2 : to_rate // 2 + to_rate]
+            passed_level = level_at(output, to_rate, passed)
+            assert abs(passed_level - 8000) < 80, f"{from_rate} -> {to_rate}: level {passed_level}"
+            if stopped < from_rate / 2:
+                # Aliased to the mirror image below the output's Nyquist frequency
+                aliased_level = level_at(output, to_rate, to_rate - stopped)
+                assert aliased_level < 80, f"{from_rate} -> {to_rate}: alias {aliased_level}"
+    print("resampling: chunked = whole, passband kept, aliases filtered")
+
+
+def measure(name: str, convert, chunks: list, seconds: float):
+    started_at = time.perf_counter()
+    for chunk in chunks:
+        convert(chunk)
+    duration = time.perf_counter() - started_at
+    print(
+        f"{name}: {seconds / duration:.0f}x real time, {duration / len(chunks) * 1_000_000:.1f}us/chunk"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if audioop is not None:
+        check_mulaw()
+    else:
+        print("audioop is not available, skipping the comparison with it")
+    check_resampling(rng)
+
+    linear = np.random.default_rng(args.seed).integers(-20000, 20000, 8000 * args.seconds)
+    linear_chunks = [
+        chunk.astype("<i2").tobytes() for chunk in np.split(linear, args.seconds * 10)
+    ]
+    ulaw_chunks = [linear16_to_ulaw(chunk) for chunk in linear_chunks]
+    measure("ulaw_to_linear16", ulaw_to_linear16, ulaw_chunks, args.seconds)
+    measure("linear16_to_ulaw", linear16_to_ulaw, linear_chunks, args.seconds)
+    if audioop is not None:
+        measure(
+            "audioop.ulaw2lin", lambda chunk: audioop.ulaw2lin(chunk, 2), ulaw_chunks, args.seconds
+        )
+        measure(
+            "audioop.lin2ulaw",
+            lambda chunk: audioop.lin2ulaw(chunk, 2),
+            linear_chunks,
+            args.seconds,
+        )
+
+    for from_rate in (16000, 24000):
+        chunks = [
+            np.repeat(np.frombuffer(chunk, dtype="<i2"), from_rate // 8000).tobytes()
+            for chunk in linear_chunks
+        ]
+        measure(
+            f"Resampler {from_rate} -> 8000",
+            Resampler(from_rate, 8000).process,
+            chunks,
+            args.seconds,
+        )
+        if audioop is not None:
+            state = None
+
+            def ratecv(chunk: bytes):
+                nonlocal state
+                _, state = audioop.ratecv(chunk, 2, 1, from_rate, 8000, state)
+
+            measure(f"audioop.ratecv {from_rate} -> 8000", ratecv, chunks, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Run CampaignDialer against a fake telephony client and check that no call is ever
+dialed twice and no more calls are in flight than there are channels.
+
+Several dialers step through the same campaign at once, bypassing the campaign lock,
+alongside a stand-in for make_outbound_call_task that claims random PENDING calls; then
+two dialers run() the campaign at once and only one of them may dial. The fake
+`dial_call` records each call, holds its channel for a moment and completes it.
+
+Run against a development database only: the campaign is set RUNNING and its calls are
+reset to PENDING before each phase. Redis is --redis-url, or an in-process stand-in
+(fakeredis with Lua support) when none is given.
+
+    python scripts/check_campaign_dialer.py --campaign-id <campaign_id> --dialers 4 --capacity 5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import CallStatus, CampaignStatus  # noqa: E402
+from jobs.dialer import CampaignDialer  # noqa: E402
+from models import AsyncDBSession  # noqa: E402
+from repositories import CallRepository, CampaignRepository  # noqa: E402
+from schemas import CallDBSchema  # noqa: E402
+from util.channels import ChannelSemaphore  # noqa: E402
+
+
+def new_redis(redis_url: str):
+    if redis_url:
+        from redis.asyncio import Redis
+
+        return Redis.from_url(redis_url)
+
+    from fakeredis.aioredis import FakeRedis
+
+    return FakeRedis()
+
+
+class FakeTelephony:
+    def __init__(self, semaphore: ChannelSemaphore, rng: random.Random):
+        self.semaphore = semaphore
+        self.rng = rng
+        self.dialed = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def dial_call(self, call: CallDBSchema) -> bool:
+        self.dialed[call.id] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.rng.uniform(0, 0.05))
+            async with AsyncDBSession() as db:
+                await CallRepository(db).update_by_id(
+                    call.id, {"status": CallStatus.COMPLETED.value}
+                )
+        finally:
+            self.in_flight -= 1
+            await self.semaphore.release(call.id)
+        return True
+
+    def check(self, name: str, calls_count: int):
+        duplicates = [call_id for call_id, count in self.dialed.items() if count > 1]
+        assert not duplicates, f"{name}: {len(duplicates)} calls dialed more than once"
+        assert len(self.dialed) == calls_count, f"{name}: {len(self.dialed)}/{calls_count} dialed"
+        assert self.max_in_flight <= self.semaphore.capacity
+        print(
+            f"{name}: {calls_count} calls dialed once each, "
+            f"at most {self.max_in_flight} in flight of {self.semaphore.capacity} channels"
+        )
+
+
+async def reset_campaign(campaign_id: str) -> int:
+    async with AsyncDBSession() as db:
+        await CampaignRepository(db).update(
+            values={"status": CampaignStatus.RUNNING.value}, id=campaign_id
+        )
+        return await CallRepository(db).update(
+            values={"status": CallStatus.PENDING.value, "retry_count": 0},
+            campaign_id=campaign_id,
+        )
+
+
+async def outbound_call_tasks(campaign_id: str, telephony: FakeTelephony, rng: random.Random):
+    """Claims calls the way make_outbound_call does, racing the dialers"""
+    async with AsyncDBSession() as db:
+        while True:
+            calls = await CallRepository(db).list(
+                campaign_id=campaign_id, status=CallStatus.PENDING.value, limit=20
+            )
+            if not calls:
+                return
+            call = rng.choice(calls)
+            if not await CallRepository(db).claim_for_dialing(call.id):
+                continue
+            if not await telephony.semaphore.acquire(call.id):
+                await CallRepository(db).unclaim_for_dialing(call.id)
+                await asyncio.sleep(0.01)
+                continue
+            await telephony.dial_call(call)
+
+
+async def step_until_done(dialer: CampaignDialer):
+    while await dialer.step():
+        continue
+
+
+async def check_concurrent_steps(args, redis, key: str):
+    calls_count = await reset_campaign(args.campaign_id)
+    semaphore = ChannelSemaphore(redis, args.capacity, lease_duration=60, key=key)
+    telephony = FakeTelephony(semaphore, random.Random(args.seed))
+    sessions = [AsyncDBSession() for _ in range(args.dialers)]
+    try:
+        dialers = [
+            CampaignDialer(
+                db,
+                args.campaign_id,
+                dial_call=telephony.dial_call,
+                channel_semaphore=semaphore,
+                redis=redis,
+                calls_per_second=args.calls_per_second,
+                poll_interval=0.1,
+            )
+            for db in sessions
+        ]
+        await asyncio.gather(
+            *[step_until_done(dialer) for dialer in dialers],
+            outbound_call_tasks(args.campaign_id, telephony, random.Random(args.seed)),
+        )
+    finally:
+        for db in sessions:
+            await db.close()
+    telephony.check(f"{args.dialers} dialers stepping at once", calls_count)
+
+
+async def check_single_runner(args, redis, key: str):
+    calls_count = await reset_campaign(args.campaign_id)
+    semaphore = ChannelSemaphore(redis, args.capacity, lease_duration=60, key=key)
+    telephony = FakeTelephony(semaphore, random.Random(args.seed))
+    async with AsyncDBSession() as first_db, AsyncDBSession() as second_db:
+        metrics = await asyncio.gather(
+            *[
+                CampaignDialer(
+                    db,
+                    args.campaign_id,
+                    dial_call=telephony.dial_call,
+                    channel_semaphore=semaphore,
+                    redis=redis,
+                    calls_per_second=args.calls_per_second,
+                    poll_interval=0.1,
+                ).run()
+                for db in (first_db, second_db)
+            ]
+        )
+    assert sorted(metric.dialed for metric in metrics) == [0, calls_count], "both dialers ran"
+    telephony.check("2 dialers running at once", calls_count)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campaign-id", required=True)
+    parser.add_argument("--redis-url")
+    parser.add_argument("--dialers", type=int, default=4)
+    parser.add_argument("--capacity", type=int, default=5)
+    parser.add_argument("--calls-per-second", type=float, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    async with AsyncDBSession() as db:
+        campaign = await CampaignRepository(db).get(id=args.campaign_id)
+    redis = new_redis(args.redis_url)
+    # Keys of their own, so a shared Redis's real leases are never touched
+    prefix = f"check_campaign_dialer:{uuid.uuid4()}"
+    try:
+        await check_concurrent_steps(args, redis, f"{prefix}:steps")
+        await check_single_runner(args, redis, f"{prefix}:run")
+    finally:
+        async with AsyncDBSession() as db:
+            await CampaignRepository(db).update(values={"status": campaign.status}, id=campaign.id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""Check that a customer set CSV can be parsed with a process pool from inside a celery
+prefork worker, whose processes are daemonic, and that it parses as sequentially.
+
+celery_app is pointed at a filesystem broker and result backend in a temporary
+directory, a prefork worker with --concurrency processes is started on it, and several
+jobs parsing a generated CSV with ParallelCustomerCSVParser and --workers processes are
+sent to it at once. Their rows and errors must match CustomerCSVParser's in this process.
+
+    python scripts/check_celery_csv_parsing.py --rows 100000 --workers 4
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from kombu import Queue  # noqa: E402
+
+from celeryworker import celery_app  # noqa: E402
+from jobs.tasks import CustomerCSVParser, ParallelCustomerCSVParser  # noqa: E402
+from util.asyncio import async_to_sync  # noqa: E402
+
+QUEUE_NAME = "check_celery_csv_parsing"
+
+
+def write_customer_csv(path: str, rows: int):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "mobile_number", "notes"])
+        for i in range(rows):
+            # Every 97th row has an invalid mobile number, no two rows share one
+            mobile_number = "12345" if i % 97 == 0 else f"+91 9{i:09d}"
+            writer.writerow([f"Customer {i}", mobile_number, 'Prefers "evening",\ncalls'])
+
+
+async def parse(parser) -> dict:
+    total_count = await parser.count_rows()
+    customers, errors = [], []
+    async for parsed in parser.parse():
+        customers += [[row_number, mobile] for row_number, _, mobile, _ in parsed.customers]
+        errors += [[row_number, error] for row_number, error, _ in parsed.errors]
+    return {"total_count": total_count, "customers": customers, "errors": errors}
+
+
+@celery_app.task(name=QUEUE_NAME)
+def parse_in_worker(path: str, workers: int, range_size: int) -> dict:
+    return async_to_sync(parse, ParallelCustomerCSVParser(path, workers, range_size))
+
+
+async def parse_sequentially(path: str) -> dict:
+    with open(path, "rb") as file:
+        return await parse(CustomerCSVParser(file))
+
+
+def configure(directory: str):
+    for folder in ("broker", "control", "results"):
+        os.mkdir(os.path.join(directory, folder))
+    celery_app.conf.update(
+        broker_url="filesystem://",
+        broker_transport_options={
+            "data_folder_in": os.path.join(directory, "broker"),
+            "data_folder_out": os.path.join(directory, "broker"),
+            "control_folder": os.path.join(directory, "control"),
+        },
+        result_backend=f"file://{os.path.join(directory, 'results')}",
+        task_default_queue=QUEUE_NAME,
+        task_queues=[Queue(QUEUE_NAME)],
+    )
+
+
+def run_worker(concurrency: int):
+    celery_app.worker_main(
+        [
+            "worker",
+            "--pool=prefork",
+            f"--concurrency={concurrency}",
+            "--loglevel=WARNING",
+            "--without-mingle",
+            "--without-gossip",
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--range-size", type=int, default=256 * 1024)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory)
+        path = os.path.join(directory, "customers.csv")
+        write_customer_csv(path, args.rows)
+        expected = async_to_sync(parse_sequentially, path)
+
+        worker = multiprocessing.get_context("fork").Process(
+            target=run_worker, args=(args.concurrency,)
+        )
+        worker.start()
+        try:
+            results = [
+                parse_in_worker.apply_async((path, args.workers, args.range_size))
+                for _ in range(args.jobs)
+            ]
+            for result in results:
+                parsed = result.get(timeout=args.timeout)
+                assert parsed["total_count"] == expected["total_count"], "row counts differ"
+                assert parsed["customers"] == expected["customers"], "customers differ"
+                assert parsed["errors"] == expected["errors"], "errors differ"
+        finally:
+            worker.terminate()
+            worker.join()
+
+    print(
+        f"{args.jobs} jobs on a prefork worker with {args.concurrency} processes parsed "
+        f"{expected['total_count']} rows with {args.workers} parse processes each: "
+        f"{len(expected['customers'])} customers and {len(expected['errors'])} errors, "
+        "as sequentially"
+    )
+
+
+if __name__ == "__main__":
+    main()
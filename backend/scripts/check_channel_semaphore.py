@@ -0,0 +1,136 @@
+"""Check that ChannelSemaphore never admits more than its capacity under concurrent
+workers, that the lease of a worker that never releases it expires, and that an expired
+lease can only be renewed within capacity.
+
+Each worker has its own Redis connection and semaphore and repeatedly acquires a lease
+for a new call, holds it for a random time and releases it. Runs against a Redis at
+--redis-url, or an in-process stand-in (fakeredis with Lua support) when none is given.
+
+    python scripts/check_channel_semaphore.py --workers 50 --capacity 5 --seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from util.channels import ChannelSemaphore  # noqa: E402
+
+
+def redis_factory(redis_url: str):
+    if redis_url:
+        from redis.asyncio import Redis
+
+        return lambda: Redis.from_url(redis_url)
+
+    from fakeredis import FakeServer
+    from fakeredis.aioredis import FakeRedis
+
+    server = FakeServer()
+    return lambda: FakeRedis(server=server)
+
+
+class Admissions:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.holding = 0
+        self.max_holding = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def enter(self):
+        self.holding += 1
+        self.admitted += 1
+        self.max_holding = max(self.max_holding, self.holding)
+        assert self.holding <= self.capacity, f"{self.holding} held, capacity {self.capacity}"
+
+    def leave(self):
+        self.holding -= 1
+
+
+async def worker(
+    semaphore: ChannelSemaphore, admissions: Admissions, deadline: float, rng: random.Random
+):
+    while time.monotonic() < deadline:
+        call_id = str(uuid.uuid4())
+        if not await semaphore.acquire(call_id):
+            admissions.rejected += 1
+            await asyncio.sleep(rng.uniform(0, 0.005))
+            continue
+        admissions.enter()
+        assert await semaphore.count() <= semaphore.capacity
+        await asyncio.sleep(rng.uniform(0, 0.02))
+        admissions.leave()
+        await semaphore.release(call_id)
+
+
+async def check_concurrent_workers(new_redis, key: str, args):
+    admissions = Admissions(args.capacity)
+    deadline = time.monotonic() + args.seconds
+    semaphores = [
+        ChannelSemaphore(new_redis(), args.capacity, lease_duration=60, key=key)
+        for _ in range(args.workers)
+    ]
+    await asyncio.gather(
+        *[
+            worker(semaphore, admissions, deadline, random.Random(args.seed + index))
+            for index, semaphore in enumerate(semaphores)
+        ]
+    )
+    assert await semaphores[0].count() == 0, "leases left after every call was released"
+    print(
+        f"{args.workers} workers, capacity {args.capacity}: {admissions.admitted} admitted, "
+        f"{admissions.rejected} rejected, at most {admissions.max_holding} held at once"
+    )
+
+
+async def check_lease_expiry(new_redis, key: str):
+    semaphore = ChannelSemaphore(new_redis(), capacity=1, lease_duration=1, key=key)
+    assert await semaphore.acquire("crashed")
+    assert not await semaphore.acquire("waiting")
+    await asyncio.sleep(1.1)
+    assert await semaphore.acquire("waiting"), "expired lease still holds the channel"
+    await semaphore.release("waiting")
+    print("lease of a holder that never releases it expires")
+
+
+async def check_refresh(new_redis, key: str):
+    semaphore = ChannelSemaphore(new_redis(), capacity=1, lease_duration=1, key=key)
+    assert await semaphore.acquire("ringing")
+    await asyncio.sleep(1.1)
+    # Expired but not purged yet, as nothing acquired since
+    assert not await semaphore.refresh("ringing"), "expired lease was refreshed"
+    assert await semaphore.count() == 0
+    assert await semaphore.acquire("waiting")
+    assert not await semaphore.renew("ringing"), "renewed past capacity"
+    await semaphore.release("waiting")
+    assert await semaphore.renew("ringing"), "released channel not renewed"
+    assert await semaphore.refresh("ringing")
+    await semaphore.release("ringing")
+    print("expired leases are not refreshed, renewing one takes a free channel only")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url")
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--capacity", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    new_redis = redis_factory(args.redis_url)
+    # Keys of their own, so a shared Redis's real leases are never touched
+    prefix = f"check_channel_semaphore:{uuid.uuid4()}"
+    await check_concurrent_workers(new_redis, f"{prefix}:concurrent", args)
+    await check_lease_expiry(new_redis, f"{prefix}:expiry")
+    await check_refresh(new_redis, f"{prefix}:refresh")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Check that every call search filter is served by its index, by explaining the page
+query the calls endpoint runs for each filter, through CallRepository.search_query,
+against the configured database. Exits with 1 if any is not.
+
+Sequential scans are disabled for the check, otherwise the planner rightly prefers them
+on the small tables of a development database. So is sorting for the filters whose index
+returns the page in order, as sorting a few rows is also cheaper than walking an index.
+
+    python scripts/explain_call_search.py --organization-id <organization_id>
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import text  # noqa: E402
+
+from constants import CallStatus  # noqa: E402
+from models import AsyncDBSession  # noqa: E402
+from repositories import CallRepository  # noqa: E402
+from schemas import CallSearchFilters, ListCallsResponse  # noqa: E402
+
+PAGE_SIZE = 100
+
+# (filters, index expected in the plan, whether the index returns the page in order)
+CASES = [
+    (CallSearchFilters(), "ix_call_organization_id_created_at_id", True),
+    (
+        CallSearchFilters(campaign_id="campaign"),
+        "ix_call_organization_id_campaign_id_created_at_id",
+        True,
+    ),
+    (
+        CallSearchFilters(status=[CallStatus.FAILED]),
+        "ix_call_organization_id_status_created_at_id",
+        True,
+    ),
+    (
+        CallSearchFilters(created_after=datetime.utcnow() - timedelta(days=7)),
+        "ix_call_organization_id_created_at_id",
+        True,
+    ),
+    (CallSearchFilters(mobile_number="9876543210"), "ix_call_organization_id_to_number", False),
+    (CallSearchFilters(transcript="refund"), "ix_call_transcript_search", False),
+]
+
+
+def index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--organization-id", required=True)
+    args = parser.parse_args()
+
+    failures = 0
+    async with AsyncDBSession() as db:
+        await db.execute(text("SET LOCAL enable_seqscan = off"))
+        repository = CallRepository(db)
+        for filters, expected_index, ordered in CASES:
+            await db.execute(text(f"SET LOCAL enable_sort = {'off' if ordered else 'on'}"))
+            q = repository.search_query(
+                args.organization_id, filters, PAGE_SIZE, projection=ListCallsResponse
+            )
+            indexes = index_names(await repository.explain(q))
+            ok = expected_index in indexes
+            failures += not ok
+            name = filters.dict(exclude_none=True) or "organization"
+            print(
+                f"{'ok' if ok else 'FAIL'}: {name} -> {', '.join(sorted(indexes)) or 'no index'}"
+            )
+        await db.rollback()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
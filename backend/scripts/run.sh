@@ -6,5 +6,6 @@ source venv/bin/activate
 case $1 in
     worker ) python src/run_celery_worker.py; exit; ;;
     beat ) python src/run_celery_beat.py; exit; ;;
+    dialer ) python src/run_async_dialer_worker.py; exit; ;;
     * ) python src/run_gunicorn.py; exit 1; ;;
 esac
@@ -0,0 +1,128 @@
+"""Replay synthesizer output through FramePacer on a simulated clock and compare it with
+sending every chunk as it arrives, as ExotelOutputDevice used to: WebSocket messages
+sent, lead of the audio sent over playback, and audio already sent to Exotel when an
+interrupt arrives, which the clear message has to discard.
+
+Each utterance is synthesized faster than real time in chunks of the given duration,
+and is interrupted at a random point of its playback.
+
+    python scripts/simulate_exotel_pacing.py --utterances 200 --frame-ms 100 --max-lead-ms 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+from collections import deque
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from streaming.telephony.pacing import FramePacer  # noqa: E402
+
+# 8kHz LINEAR16
+BYTES_PER_SECOND = 16000
+SAMPLE_WIDTH = 2
+
+# (arrival time, chunk)
+Chunk = Tuple[float, bytes]
+
+SCENARIOS = {
+    "20ms chunks": (20, 20),
+    "1s chunks": (1000, 1000),
+    "mixed chunks": (20, 1500),
+}
+
+
+def synthesize(rng: random.Random, chunk_ms: Tuple[int, int]) -> List[Chunk]:
+    duration = rng.uniform(2, 8)
+    speed = rng.uniform(3, 10)
+    chunks = []
+    synthesized = 0.0
+    while synthesized < duration:
+        length = rng.randint(*chunk_ms) / 1000
+        synthesized += length
+        chunks.append((synthesized / speed, bytes(int(length * BYTES_PER_SECOND) // 2 * 2)))
+    return chunks
+
+
+def unpaced(chunks: List[Chunk], interrupt_at: float) -> Tuple[int, List[float], float]:
+    messages = 0
+    playback_end = 0.0
+    leads = []
+    for arrival, chunk in chunks:
+        if arrival >= interrupt_at:
+            break
+        leads.append(max(playback_end - arrival, 0))
+        playback_end = max(playback_end, arrival) + len(chunk) / BYTES_PER_SECOND
+        messages += 2
+    return messages, leads, max(playback_end - interrupt_at, 0)
+
+
+def paced(
+    chunks: List[Chunk], interrupt_at: float, frame_ms: int, max_lead_ms: int
+) -> Tuple[int, List[float], float]:
+    """Mirrors ExotelOutputDevice._send_audio_frames with time simulated. Waits shorter
+    than 1ns are skipped, as rounding can leave them too small to move the clock."""
+    pacer: FramePacer[int] = FramePacer(BYTES_PER_SECOND, frame_ms, max_lead_ms, SAMPLE_WIDTH)
+    pending = deque(enumerate(chunks))
+    messages = 0
+    now = 0.0
+    while now < interrupt_at and (pending or len(pacer)):
+        while pending and pending[0][1][0] <= now:
+            index, (_, chunk) = pending.popleft()
+            pacer.add(chunk, index)
+        if not pacer.has_frame():
+            timeout = pacer.lead(now) - pacer.frame_duration if len(pacer) else None
+            if pending and (timeout is None or timeout > 1e-9):
+                next_arrival = pending[0][1][0]
+                now = next_arrival if timeout is None else min(next_arrival, now + timeout)
+                continue
+        delay = pacer.delay(now)
+        if delay > 1e-9:
+            now += delay
+            continue
+        _, finished = pacer.next_frame(now)
+        messages += 1 + bool(finished)
+    leads = [pacer.stats.frame_lead_max]
+    return messages, leads, pacer.lead(interrupt_at)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--utterances", type=int, default=200)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--max-lead-ms", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for name, chunk_ms in SCENARIOS.items():
+        rng = random.Random(args.seed)
+        results = {"unpaced": ([], [], []), "paced": ([], [], [])}
+        for _ in range(args.utterances):
+            chunks = synthesize(rng, chunk_ms)
+            duration = sum(len(chunk) for _, chunk in chunks) / BYTES_PER_SECOND
+            interrupt_at = rng.uniform(0.2, duration)
+            for mode, result in (
+                ("unpaced", unpaced(chunks, interrupt_at)),
+                ("paced", paced(chunks, interrupt_at, args.frame_ms, args.max_lead_ms)),
+            ):
+                messages, leads, discarded = result
+                results[mode][0].append(messages)
+                results[mode][1].append(max(leads, default=0))
+                results[mode][2].append(discarded)
+
+        print(name)
+        for mode, (messages, leads, discarded) in results.items():
+            print(
+                f"  {mode}: {statistics.mean(messages):.0f} messages/utterance, "
+                f"max lead {max(leads) * 1000:.0f}ms, audio sent at interrupt "
+                f"p50={statistics.median(discarded) * 1000:.0f}ms max={max(discarded) * 1000:.0f}ms"
+            )
+        # Frames are held until the lead is within max_lead
+        assert max(results["paced"][1]) <= (args.max_lead_ms + 1) / 1000
+
+
+if __name__ == "__main__":
+    main()
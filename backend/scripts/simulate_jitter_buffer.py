@@ -0,0 +1,143 @@
+"""Replay synthetic lossy and bursty Exotel media traces through JitterBuffer and check
+the audio handed to the transcriber: every received sample in its place, silence where
+frames were lost, fixed-size frames throughout, and the extra latency added.
+
+Frames carry a counter in every sample so misplaced audio is detected exactly.
+
+    python scripts/simulate_jitter_buffer.py --frames 3000 --seed 7
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from streaming.telephony.jitter_buffer import JitterBuffer  # noqa: E402
+
+# 8kHz LINEAR16 in 20ms frames, as Exotel sends them
+SAMPLING_RATE = 8000
+SAMPLE_WIDTH = 2
+SILENCE = b"\x00\x00"
+FRAME_MS = 20
+FRAME_SIZE = FRAME_MS * SAMPLING_RATE * SAMPLE_WIDTH // 1000
+DEPTH_MS = 60
+
+# (timestamp, chunk, arrival time in ms)
+Packet = Tuple[int, bytes, float]
+
+
+def frame_audio(index: int) -> bytes:
+    # Never silence, so concealed audio can be told apart
+    return ((index % 65535) + 1).to_bytes(SAMPLE_WIDTH, "little") * (FRAME_SIZE // SAMPLE_WIDTH)
+
+
+def in_order(frames: int, rng: random.Random) -> Tuple[List[Packet], set]:
+    return [(i * FRAME_MS, frame_audio(i), i * FRAME_MS) for i in range(frames)], set()
+
+
+def lossy(frames: int, rng: random.Random) -> Tuple[List[Packet], set]:
+    """Independent 2% loss, plus a burst of 5-15 lost frames every ~500 frames."""
+    lost = {i for i in range(1, frames - 1) if rng.random() < 0.02}
+    for start in range(rng.randrange(100, 500), frames - 20, 500):
+        lost.update(range(start, start + rng.randint(5, 15)))
+    packets = [
+        (i * FRAME_MS, frame_audio(i), i * FRAME_MS) for i in range(frames) if i not in lost
+    ]
+    return packets, lost
+
+
+def jittery(frames: int, rng: random.Random) -> Tuple[List[Packet], set]:
+    """Network delay of 0-40ms per frame, so frames regularly arrive out of order."""
+    packets = [
+        (i * FRAME_MS, frame_audio(i), i * FRAME_MS + rng.uniform(0, 40)) for i in range(frames)
+    ]
+    return sorted(packets, key=lambda packet: packet[2]), set()
+
+
+def bursty(frames: int, rng: random.Random) -> Tuple[List[Packet], set]:
+    """Delivery stalls for 100-400ms and then delivers the backlog at once, with
+    duplicates retransmitted after some stalls."""
+    packets = []
+    released_at = 0.0
+    for i in range(frames):
+        if rng.random() < 0.01:
+            released_at = max(released_at, i * FRAME_MS + rng.uniform(100, 400))
+        arrival = max(i * FRAME_MS, released_at)
+        packets.append((i * FRAME_MS, frame_audio(i), arrival))
+        if arrival > i * FRAME_MS and rng.random() < 0.05:
+            packets.append((i * FRAME_MS, frame_audio(i), arrival + 1))
+    return sorted(packets, key=lambda packet: packet[2]), set()
+
+
+def lossy_jittery(frames: int, rng: random.Random) -> Tuple[List[Packet], set]:
+    packets, lost = lossy(frames, rng)
+    delayed = [
+        (timestamp, chunk, arrival + rng.uniform(0, 40)) for timestamp, chunk, arrival in packets
+    ]
+    return sorted(delayed, key=lambda packet: packet[2]), lost
+
+
+SCENARIOS = {
+    "in order": in_order,
+    "lossy": lossy,
+    "jittery": jittery,
+    "bursty": bursty,
+    "lossy + jittery": lossy_jittery,
+}
+
+
+def simulate(name: str, packets: List[Packet], lost: set, frames: int):
+    buffer = JitterBuffer(
+        sampling_rate=SAMPLING_RATE,
+        sample_width=SAMPLE_WIDTH,
+        silence=SILENCE,
+        frame_ms=FRAME_MS,
+        depth_ms=DEPTH_MS,
+    )
+    output: List[bytes] = []
+    # Milliseconds between a frame's arrival and it being passed on
+    delays = []
+    arrivals = {}
+    for timestamp, chunk, arrival in packets:
+        arrivals.setdefault(timestamp // FRAME_MS, arrival)
+        for frame in buffer.push(timestamp, chunk):
+            index = len(output)
+            output.append(frame)
+            if index in arrivals:
+                delays.append(arrival - arrivals[index])
+    output.extend(buffer.flush())
+
+    assert all(len(frame) == FRAME_SIZE for frame in output), "frames are not fixed-size"
+    assert len(output) == frames, f"expected {frames} frames, got {len(output)}"
+    for index, frame in enumerate(output):
+        expected = SILENCE * (FRAME_SIZE // SAMPLE_WIDTH) if index in lost else frame_audio(index)
+        assert frame == expected, f"frame {index} is misplaced"
+    assert buffer.stats.bytes_concealed == len(lost) * FRAME_SIZE
+
+    stats = buffer.stats
+    print(
+        f"{name}: {stats.frames_received} received, {stats.frames_reordered} reordered, "
+        f"{stats.frames_dropped} dropped, {stats.gaps_concealed} gaps "
+        f"({stats.bytes_concealed // FRAME_SIZE * FRAME_MS}ms) concealed; added latency "
+        f"p50={statistics.median(delays):.1f}ms p99={statistics.quantiles(delays, n=100)[-1]:.1f}ms "
+        f"max={max(delays):.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for name, scenario in SCENARIOS.items():
+        packets, lost = scenario(args.frames, random.Random(args.seed))
+        simulate(name, packets, lost, args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,30 @@
+import hashlib
+import time
+
 import jwt
 from fastapi import Depends, Header
 from jwt.exceptions import InvalidTokenError
 from supabase._async.client import AsyncClient as Client
 from supabase._async.client import create_client
 
-from config import SUPABASE_JWT_SECRET, SUPABASE_KEY, SUPABASE_URL
+from config import JWT_CACHE_SIZE, JWT_CACHE_TTL, SUPABASE_JWT_SECRET, SUPABASE_KEY, SUPABASE_URL
 from constants import UserRole
 from exceptions import ForbiddenException, UnauthorizedException
+from util.cache import TTLCache
+from util.supabase_client import get_supabase_client
+
+# Verified token payloads keyed by the token's digest. An entry never outlives the
+# token's `exp`, and is dropped after JWT_CACHE_TTL in any case.
+_verified_tokens: TTLCache[dict] = TTLCache(JWT_CACHE_SIZE)
 
 
 async def get_supabase() -> Client:
+    """Process-wide client with pooled connections, authenticated with the service key"""
+    return get_supabase_client()
+
+
+async def get_supabase_session_client() -> Client:
+    """Separate client for signing users in, which keeps the user's session"""
     return await create_client(SUPABASE_URL, SUPABASE_KEY)
 
 
@@ -24,6 +39,11 @@ async def get_current_user(
         raise UnauthorizedException(detail="Invalid token format")
 
     token = split_header[1]
+    token_digest = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(token_digest)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(
             token, key=SUPABASE_JWT_SECRET, algorithms=["HS256"], audience="authenticated"
@@ -32,6 +52,11 @@ async def get_current_user(
             raise UnauthorizedException(detail="Invalid token payload")
     except InvalidTokenError as e:
         raise UnauthorizedException(e, detail="Invalid token")
+
+    expires_at = time.time() + JWT_CACHE_TTL
+    if "exp" in payload:
+        expires_at = min(expires_at, payload["exp"])
+    _verified_tokens.set(token_digest, payload, expires_at)
     return payload
 
 
@@ -1,8 +1,9 @@
 from celery import Celery
-from celery.signals import setup_logging
+from celery.signals import setup_logging, worker_process_init, worker_process_shutdown
 from kombu import Queue
 
 from config import DEBUG, SQS_QUEUE_NAME, SQS_QUEUE_URL
+from util.worker import setup_worker_process, teardown_worker_process
 
 celery_config = {
     "broker_url": f"sqs://@{SQS_QUEUE_URL.split('://')[1]}",
@@ -25,6 +26,17 @@ if not DEBUG:
 celery_app = Celery(__name__, include=["jobs.tasks", "jobs.call"])
 celery_app.config_from_object(celery_config)
 
+
+@worker_process_init.connect
+def init_worker_process(*args, **kwargs):
+    setup_worker_process()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(*args, **kwargs):
+    teardown_worker_process()
+
+
 @setup_logging.connect
 def void(*args, **kwargs):
     """Override celery's logging setup to prevent it from altering our settings.
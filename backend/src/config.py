@@ -47,16 +47,38 @@ SYNC_DB_URI = f"postgresql://{BASE_DB_URI}"
 SUPABASE_URL = getenv("SUPABASE_URL")
 SUPABASE_KEY = getenv("SUPABASE_KEY")
 SUPABASE_JWT_SECRET = getenv("SUPABASE_JWT_SECRET")
+JWT_CACHE_SIZE = int(getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL = int(getenv("JWT_CACHE_TTL", "300"))
+SUPABASE_MAX_CONNECTIONS = int(getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_MAX_KEEPALIVE_CONNECTIONS = int(getenv("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = int(getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
 
 SUPABASE_CUSTOMER_SET_BUCKET_NAME = getenv("SUPABASE_CUSTOMER_SET_BUCKET_NAME")
+CUSTOMER_SET_CHUNK_SIZE = int(getenv("CUSTOMER_SET_CHUNK_SIZE", "10000"))
+CUSTOMER_SET_PARSE_WORKERS = int(getenv("CUSTOMER_SET_PARSE_WORKERS", "1"))
+CUSTOMER_SET_PARSE_RANGE_SIZE = int(getenv("CUSTOMER_SET_PARSE_RANGE_SIZE", "4194304"))
+CUSTOMER_SET_DELETE_BATCH_SIZE = int(getenv("CUSTOMER_SET_DELETE_BATCH_SIZE", "5000"))
+CUSTOMER_SET_DELETE_RETRY_INTERVAL = int(getenv("CUSTOMER_SET_DELETE_RETRY_INTERVAL", "1"))
+SIGNED_URL_EXPIRY = int(getenv("SIGNED_URL_EXPIRY", "3600"))
+STORAGE_UPLOAD_CHUNK_SIZE = int(getenv("STORAGE_UPLOAD_CHUNK_SIZE", "1048576"))
 
 SQS_QUEUE_URL = getenv("SQS_QUEUE_URL")
 SQS_QUEUE_NAME = getenv("SQS_QUEUE_NAME")
 
 CHANNELS_AVAILABLE_COUNT = int(getenv("CHANNELS_AVAILABLE_COUNT", "1"))
+CHANNEL_LEASE_DURATION = int(getenv("CHANNEL_LEASE_DURATION", "1800"))
 CALL_RETRY_INTERVAL = int(getenv("CALL_RETRY_INTERVAL", "30"))
 CALL_TIMEOUT_DURATION = int(getenv("CALL_TIMEOUT_DURATION", "30"))
 CALL_TIMEOUT_TASK_INTERVAL = int(getenv("CALL_TIMEOUT_TASK_INTERVAL", "15"))
+CALL_CREATION_BATCH_SIZE = int(getenv("CALL_CREATION_BATCH_SIZE", "1000"))
+CALL_CONFIG_CACHE_SIZE = int(getenv("CALL_CONFIG_CACHE_SIZE", "256"))
+COUNT_CACHE_TTL = int(getenv("COUNT_CACHE_TTL", "30"))
+
+DIALER_CALLS_PER_SECOND = float(getenv("DIALER_CALLS_PER_SECOND", "1"))
+DIALER_POLL_INTERVAL = int(getenv("DIALER_POLL_INTERVAL", "5"))
+DIALER_BATCH_SIZE = int(getenv("DIALER_BATCH_SIZE", "100"))
+DIALER_CONCURRENCY = int(getenv("DIALER_CONCURRENCY", "100"))
+DIALER_LOCK_TTL = int(getenv("DIALER_LOCK_TTL", "120"))
 
 EXOTEL_ACCOUNT_SID = getenv("EXOTEL_ACCOUNT_SID")
 EXOTEL_API_KEY = getenv("EXOTEL_API_KEY")
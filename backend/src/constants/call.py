@@ -8,6 +8,7 @@ class CallType(str, Enum):
 
 class CallStatus(str, Enum):
     PENDING = "PENDING"
+    DIALING = "DIALING"
     INITIATED = "INITIATED"
     TIMEOUT = "TIMEOUT"
     IN_PROGRESS = "IN_PROGRESS"
@@ -16,6 +17,11 @@ class CallStatus(str, Enum):
     CANCELLED = "CANCELLED"
 
 
+# Text search configuration of the transcript index. `simple` only lowercases words,
+# transcripts mix languages so stemming for one of them would miss the others.
+TRANSCRIPT_SEARCH_CONFIG = "simple"
+
+
 DEFAULT_INITIAL_MESSAGE = "Hello, am I speaking to Mohit?"
 DEFAULT_PROMPT = """You can Kunal from Apple. You are free to call the tools provided to you. NEVER say anything else when calling a tool, not even things like 'Please call the following tool'. You can talk in English or Hindi.
 Goal: Help recover sales drop-offs and abandoned carts for customers by engaging in conversation and understanding their needs. This how I want the call flow to look like: 
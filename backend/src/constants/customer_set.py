@@ -6,5 +6,8 @@ class CustomerSetType(str, Enum):
 
 class CustomerSetStatus(str, Enum):
     UPLOADED = "UPLOADED"
+    PROCESSING = "PROCESSING"
     PROCESSED = "PROCESSED"
+    # Customers are being deleted in the background, `processed_count` of `total_count`
+    DELETING = "DELETING"
 
@@ -6,3 +6,9 @@ CURSOR_SEPARATOR = "__"
 class CursorPrefix(str, Enum):
     NEXT = "next"
     PREV = "prev"
+
+
+class CountStrategy(str, Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATE = "estimate"
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,11 +13,13 @@ from vocode.streaming.models.events import (
 from vocode.streaming.models.transcript import TranscriptCompleteEvent
 from vocode.streaming.utils.events_manager import EventsManager
 
+from config import CHANNEL_LEASE_DURATION
 from constants import CallStatus
 from exceptions import DatabaseException
 from log import log
 from models import get_db
 from repositories import CallRepository
+from util.channels import CHANNEL_SEMAPHORE
 
 
 class CustomEventsManager(EventsManager):
@@ -30,6 +33,8 @@ class CustomEventsManager(EventsManager):
                 EventType.PHONE_CALL_ENDED,
             ]
         )
+        # Tasks renewing the channel lease of each answered call until it ends
+        self._lease_keepers: dict[str, asyncio.Task] = {}
 
     async def handle_event(self, event: Event):
         log.warning(f"Received event {type(event)} for conversation {event.conversation_id}")
@@ -41,23 +46,50 @@ class CustomEventsManager(EventsManager):
             if isinstance(event, ActionEvent):
                 log.warning(f"[Action event] {event.action_input} {event.action_output}")
             if isinstance(event, TranscriptCompleteEvent):
-                await CallRepository(db).update(
-                    values={"transcript": event.transcript.to_string()}, id=event.conversation_id
+                await CallRepository(db).update_by_id(
+                    event.conversation_id, {"transcript": event.transcript.to_string()}
                 )
             if isinstance(event, PhoneCallConnectedEvent):
-                await CallRepository(db).update(
-                    values={"start_time": datetime.utcnow(), "status": CallStatus.IN_PROGRESS.value},
-                    id=event.conversation_id,
+                await self._hold_channel(event.conversation_id)
+                await CallRepository(db).update_by_id(
+                    event.conversation_id,
+                    {"start_time": datetime.utcnow(), "status": CallStatus.IN_PROGRESS.value},
                 )
             if isinstance(event, PhoneCallDidNotConnectEvent):
+                await self._release_channel(event.conversation_id)
                 log.warning(
                     f"[Phone call did not connect event] {event.to_phone_number} -> {event.from_phone_number}"
                 )
             if isinstance(event, PhoneCallEndedEvent):
-                await CallRepository(db).update(
-                    values={"end_time": datetime.utcnow(), "status": CallStatus.COMPLETED.value},
-                    id=event.conversation_id,
+                await self._release_channel(event.conversation_id)
+                await CallRepository(db).update_by_id(
+                    event.conversation_id,
+                    {"end_time": datetime.utcnow(), "status": CallStatus.COMPLETED.value},
                 )
         except DatabaseException as e:
             log.error(f"Error handling event {type(event)}: {e}")
 
+    async def _hold_channel(self, conversation_id: str):
+        """Renew the lease of an answered call, which is gone if the call rang past
+        CALL_TIMEOUT_DURATION, and keep renewing it for as long as the call lasts"""
+        if not await CHANNEL_SEMAPHORE.renew(conversation_id):
+            log.error(f"No channel left for answered call {conversation_id}, over capacity")
+        self._lease_keepers[conversation_id] = asyncio.create_task(
+            self._keep_lease(conversation_id)
+        )
+
+    async def _keep_lease(self, conversation_id: str):
+        while True:
+            await asyncio.sleep(CHANNEL_LEASE_DURATION / 3)
+            try:
+                if not await CHANNEL_SEMAPHORE.renew(conversation_id):
+                    log.error(f"No channel left for call {conversation_id}, over capacity")
+            except Exception as e:
+                # Retried on the next beat, well before the lease runs out
+                log.error(f"Error renewing channel lease for call {conversation_id}: {e}")
+
+    async def _release_channel(self, conversation_id: str):
+        keeper = self._lease_keepers.pop(conversation_id, None)
+        if keeper:
+            keeper.cancel()
+        await CHANNEL_SEMAPHORE.release(conversation_id)
@@ -1,2 +1,2 @@
-from .tasks import process_csv_file_task
-from .call import make_outbound_call_task, execute_campaign_task
+from .tasks import delete_customer_set_task, process_csv_file_task
+from .call import make_outbound_call_task, execute_campaign_task, run_campaign_dialer_task
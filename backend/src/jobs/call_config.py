@@ -0,0 +1,296 @@
+import copy
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from vocode.streaming.models.agent import (
+    AgentConfig,
+    AzureOpenAIConfig,
+    ChatGPTAgentConfig,
+    GroqAgentConfig,
+    LangchainAgentConfig,
+)
+from vocode.streaming.models.client_backend import OutputAudioConfig
+from vocode.streaming.models.message import BaseMessage
+from vocode.streaming.models.synthesizer import (
+    ElevenLabsSynthesizerConfig,
+    GoogleSynthesizerConfig,
+    SynthesizerConfig,
+)
+from vocode.streaming.models.telephony import TelephonyProviderConfig, TwilioConfig
+from vocode.streaming.models.transcriber import DeepgramTranscriberConfig, TranscriberConfig
+from vocode.streaming.transcriber.deepgram_transcriber import DeepgramEndpointingConfig
+
+from actions import StoreRemarkActionConfig
+from config import (
+    CALL_CONFIG_CACHE_SIZE,
+    EXOTEL_ACCOUNT_SID,
+    EXOTEL_API_KEY,
+    EXOTEL_API_TOKEN,
+    TWILIO_ACCOUNT_SID,
+    TWILIO_AUTH_TOKEN,
+)
+from constants import (
+    AgentActionConfigClass,
+    AgentConfigClass,
+    SynthesizerConfigClass,
+    TelephonyServiceConfigClass,
+    TranscriberConfigClass,
+)
+from models import CallConfig
+from repositories import (
+    AgentRepository,
+    CallConfigRepository,
+    OrganizationRepository,
+    SynthesizerRepository,
+    TelephonyServiceRepository,
+    TranscriberRepository,
+)
+from schemas import CallConfigDBInputSchema, CallConfigDBSchema, CallDBSchema, CampaignDBSchema
+from streaming.models.telephony import ExotelConfig
+from util.cache import LRUCache
+
+# Bump when the shape of the stored snapshot or how it is interpreted changes
+CALL_CONFIG_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ResolvedCallConfig:
+    telephony_service_id: str
+    agent_id: str
+    transcriber_id: str
+    synthesizer_id: str
+    outbound_caller_number: str
+    call_config: CallConfigDBInputSchema
+
+
+@dataclass(frozen=True)
+class VocodeCallConfigs:
+    """vocode config objects built from a call config snapshot. Only the agent config
+    depends on the customer, so it is kept as constructor arguments."""
+
+    telephony_config_class: str
+    telephony_config: TelephonyProviderConfig
+    agent_config_class: str
+    agent_config_kwargs: dict
+    transcriber_config: Optional[TranscriberConfig]
+    synthesizer_config: Optional[SynthesizerConfig]
+
+    def get_telephony_params(self, call: CallDBSchema) -> Tuple[str, Optional[dict]]:
+        if self.telephony_config_class == TelephonyServiceConfigClass.EXOTEL.value:
+            return f"0{call.to_number}", {"CustomField": call.id}
+        return f"+91{call.to_number}", None
+
+    def get_agent_config(self, prompt: str, initial_message: str) -> Optional[AgentConfig]:
+        agent_config = {
+            **self.agent_config_kwargs,
+            "prompt_preamble": prompt,
+            "initial_message": BaseMessage(text=initial_message),
+        }
+        if self.agent_config_class == AgentConfigClass.CHATGPT.value:
+            return ChatGPTAgentConfig(**agent_config)
+        elif self.agent_config_class == AgentConfigClass.GROQ.value:
+            return GroqAgentConfig(**agent_config)
+        elif self.agent_config_class == AgentConfigClass.LANGCHAIN.value:
+            return LangchainAgentConfig(**agent_config)
+
+
+# Snapshots are immutable and addressed by their content, so cached entries never go
+# stale: editing an organization, campaign, agent, etc. yields a snapshot with a new id.
+_call_configs: LRUCache[CallConfigDBSchema] = LRUCache(CALL_CONFIG_CACHE_SIZE)
+_vocode_call_configs: LRUCache[VocodeCallConfigs] = LRUCache(CALL_CONFIG_CACHE_SIZE)
+
+
+def compute_call_config_id(content: dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"version": CALL_CONFIG_VERSION, **content},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def resolve_campaign_call_config(
+    db: AsyncSession, campaign: CampaignDBSchema, created_by: str
+) -> ResolvedCallConfig:
+    """Merge the organization defaults, campaign overrides and service configs into the
+    snapshot every call of this campaign run is made with"""
+    organization = await OrganizationRepository(db).get(id=campaign.organization_id)
+
+    telephony_service_id = organization.telephony_service_id
+    telephony_service_config = organization.telephony_service_config or {}
+    agent_id = organization.agent_id
+    agent_config = organization.agent_config or {}
+    transcriber_id = organization.transcriber_id
+    transcriber_config = organization.transcriber_config or {}
+    synthesizer_id = organization.synthesizer_id
+    synthesizer_config = organization.synthesizer_config or {}
+
+    if campaign.telephony_service_id:
+        telephony_service_id = campaign.telephony_service_id
+        telephony_service_config = campaign.telephony_service_config or {}
+
+    if campaign.agent_id:
+        agent_id = campaign.agent_id
+        agent_config = campaign.agent_config or {}
+
+    if campaign.transcriber_id:
+        transcriber_id = campaign.transcriber_id
+        transcriber_config = campaign.transcriber_config or {}
+
+    if campaign.synthesizer_id:
+        synthesizer_id = campaign.synthesizer_id
+        synthesizer_config = campaign.synthesizer_config or {}
+
+    telephony_service = await TelephonyServiceRepository(db).get(id=telephony_service_id)
+    agent = await AgentRepository(db).get(id=agent_id)
+    transcriber = await TranscriberRepository(db).get(id=transcriber_id)
+    synthesizer = await SynthesizerRepository(db).get(id=synthesizer_id)
+
+    telephony_service_config = {**telephony_service.config, **telephony_service_config}
+    outbound_caller_number = telephony_service_config.pop("outbound_caller_number")
+
+    content = {
+        "telephony_service_config": telephony_service_config,
+        "agent_config": {**agent.config, **agent_config},
+        "transcriber_config": {**transcriber.config, **transcriber_config},
+        "synthesizer_config": {**synthesizer.config, **synthesizer_config},
+    }
+    return ResolvedCallConfig(
+        telephony_service_id=telephony_service_id,
+        agent_id=agent_id,
+        transcriber_id=transcriber_id,
+        synthesizer_id=synthesizer_id,
+        outbound_caller_number=outbound_caller_number,
+        call_config=CallConfigDBInputSchema(
+            id=compute_call_config_id(content),
+            version=CALL_CONFIG_VERSION,
+            **content,
+            created_by=created_by,
+            updated_by=created_by,
+        ),
+    )
+
+
+async def save_call_config(db: AsyncSession, call_config: CallConfigDBInputSchema):
+    await CallConfigRepository(db).bulk_create(
+        [call_config], on_conflict=lambda q: {"index_elements": [CallConfig.id]}
+    )
+
+
+async def get_call_config(db: AsyncSession, call_config_id: str) -> CallConfigDBSchema:
+    call_config = _call_configs.get(call_config_id)
+    if call_config is None:
+        call_config = await CallConfigRepository(db).get(id=call_config_id)
+        _call_configs.set(call_config.id, call_config)
+    return call_config
+
+
+def get_vocode_call_configs(call_config: CallConfigDBSchema) -> VocodeCallConfigs:
+    vocode_call_configs = _vocode_call_configs.get(call_config.id)
+    if vocode_call_configs is None:
+        vocode_call_configs = build_vocode_call_configs(call_config)
+        _vocode_call_configs.set(call_config.id, vocode_call_configs)
+    return vocode_call_configs
+
+
+def build_vocode_call_configs(call_config: CallConfigDBSchema) -> VocodeCallConfigs:
+    # The builders consume their input, the snapshot itself may be cached
+    call_config = copy.deepcopy(call_config)
+    telephony_config_class, telephony_config = get_telephony_service_config(
+        call_config.telephony_service_config
+    )
+    agent_config_class, agent_config_kwargs = get_agent_config_kwargs(call_config.agent_config)
+    return VocodeCallConfigs(
+        telephony_config_class=telephony_config_class,
+        telephony_config=telephony_config,
+        agent_config_class=agent_config_class,
+        agent_config_kwargs=agent_config_kwargs,
+        transcriber_config=get_transcriber_config(call_config.transcriber_config),
+        synthesizer_config=get_synthesizer_config(call_config.synthesizer_config),
+    )
+
+
+def get_telephony_service_config(
+    telephony_service_config: dict,
+) -> Tuple[str, Optional[TelephonyProviderConfig]]:
+    telephony_service_config_class = telephony_service_config.pop("config_class")
+
+    if telephony_service_config_class == TelephonyServiceConfigClass.TWILIO.value:
+        return telephony_service_config_class, TwilioConfig(
+            account_sid=TWILIO_ACCOUNT_SID,
+            auth_token=TWILIO_AUTH_TOKEN,
+            **telephony_service_config,
+        )
+    elif telephony_service_config_class == TelephonyServiceConfigClass.EXOTEL.value:
+        return telephony_service_config_class, ExotelConfig(
+            account_sid=EXOTEL_ACCOUNT_SID,
+            api_key=EXOTEL_API_KEY,
+            api_token=EXOTEL_API_TOKEN,
+            **telephony_service_config,
+        )
+    return telephony_service_config_class, None
+
+
+def get_agent_config_kwargs(agent_config: dict) -> Tuple[str, dict]:
+    agent_config_class = agent_config.pop("config_class")
+
+    agent_action_configs = agent_config.pop("actions")
+    actions = []
+    for action_config in agent_action_configs:
+        action_config_class = action_config.pop("config_class")
+        if action_config_class == AgentActionConfigClass.STORE_REMARK.value:
+            actions.append(StoreRemarkActionConfig(**action_config))
+
+    agent_config = {**agent_config, "actions": actions}
+
+    if agent_config_class == AgentConfigClass.CHATGPT.value:
+        azure_params = agent_config.pop("azure_params")
+        if azure_params:
+            agent_config["azure_params"] = AzureOpenAIConfig(
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                **azure_params,
+            )
+    return agent_config_class, agent_config
+
+
+def get_transcriber_config(transcriber_config: dict) -> Optional[TranscriberConfig]:
+    transcriber_config_class = transcriber_config.pop("config_class")
+    if transcriber_config_class == TranscriberConfigClass.DEEPGRAM.value:
+        endpointing_config = transcriber_config.pop("endpointing_config")
+        if endpointing_config:
+            return DeepgramTranscriberConfig(
+                **transcriber_config,
+                endpointing_config=DeepgramEndpointingConfig(**endpointing_config),
+            )
+        else:
+            return DeepgramTranscriberConfig(**transcriber_config)
+
+
+def get_synthesizer_config(synthesizer_config: dict) -> Optional[SynthesizerConfig]:
+    synthesizer_config_class = synthesizer_config.pop("config_class")
+    if synthesizer_config_class == SynthesizerConfigClass.GOOGLE.value:
+        output_audio_config = synthesizer_config.pop("output_audio_config")
+        if output_audio_config:
+            return GoogleSynthesizerConfig.from_output_audio_config(
+                **synthesizer_config,
+                output_audio_config=OutputAudioConfig(**output_audio_config),
+            )
+        else:
+            return GoogleSynthesizerConfig.from_telephone_output_device(**synthesizer_config)
+    elif synthesizer_config_class == SynthesizerConfigClass.ELEVEN_LABS.value:
+        output_audio_config = synthesizer_config.pop("output_audio_config")
+        if output_audio_config:
+            return ElevenLabsSynthesizerConfig.from_output_audio_config(
+                api_key=os.getenv("ELEVEN_LABS_API_KEY"),
+                **synthesizer_config,
+                output_audio_config=OutputAudioConfig(**output_audio_config),
+            )
+        else:
+            return ElevenLabsSynthesizerConfig(
+                api_key=os.getenv("ELEVEN_LABS_API_KEY"), **synthesizer_config
+            )
@@ -0,0 +1,333 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import (
+    CALL_RETRY_INTERVAL,
+    DIALER_BATCH_SIZE,
+    DIALER_CALLS_PER_SECOND,
+    DIALER_CONCURRENCY,
+    DIALER_LOCK_TTL,
+    DIALER_POLL_INTERVAL,
+)
+from constants import CallStatus, CampaignStatus
+from exceptions import RecordNotFoundException
+from log import log
+from models import AsyncDBSession, Call
+from repositories import CallRepository, CampaignRepository
+from schemas import CallDBSchema, CampaignDBSchema
+from util.channels import CHANNEL_SEMAPHORE, ChannelSemaphore
+from util.redis_client import REDIS_CLIENT
+
+DIALER_LOCK_KEY = "campaign_dialer:{campaign_id}"
+
+# The lock holds its owner's token, so a dialer whose lock expired and was taken over
+# can neither refresh nor delete the new owner's lock.
+# KEYS[1]: lock key, ARGV[1]: owner token, ARGV[2]: TTL (s)
+REFRESH_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS[1]: lock key, ARGV[1]: owner token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+ACTIVE_CALL_STATUSES = [
+    CallStatus.DIALING.value,
+    CallStatus.INITIATED.value,
+    CallStatus.IN_PROGRESS.value,
+]
+RETRYABLE_CALL_STATUSES = [CallStatus.FAILED.value, CallStatus.TIMEOUT.value]
+
+DialCall = Callable[[CallDBSchema], Awaitable[bool]]
+
+
+@dataclass
+class DialerMetrics:
+    started_at: float = field(default_factory=time.monotonic)
+    dialed: int = 0
+    failed: int = 0
+    retried: int = 0
+    channel_waits: int = 0
+
+    @property
+    def calls_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.dialed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"dialed={self.dialed} failed={self.failed} retried={self.retried} "
+            f"channel_waits={self.channel_waits} calls_per_second={self.calls_per_second:.2f}"
+        )
+
+
+class CampaignDialer:
+    """Pacing loop that dials the PENDING calls of a single campaign as channels free up.
+
+    Calls are dialed in priority order (fewest retries first, then oldest), never faster
+    than `calls_per_second`. FAILED and TIMEOUT calls are moved back to PENDING until they
+    reach the campaign's `max_retries`. The loop ends when the campaign stops, passes its
+    `end_date`, or has nothing left to dial.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        campaign_id: str,
+        dial_call: DialCall,
+        channel_semaphore: ChannelSemaphore = CHANNEL_SEMAPHORE,
+        redis: Redis = REDIS_CLIENT,
+        calls_per_second: float = DIALER_CALLS_PER_SECOND,
+        poll_interval: float = DIALER_POLL_INTERVAL,
+        batch_size: int = DIALER_BATCH_SIZE,
+        dial_slots: Optional[asyncio.Semaphore] = None,
+    ):
+        self.db = db
+        self.campaign_id = campaign_id
+        self.dial_call = dial_call
+        self.channel_semaphore = channel_semaphore
+        self.redis = redis
+        self.lock_key = DIALER_LOCK_KEY.format(campaign_id=campaign_id)
+        self.lock_token = uuid.uuid4().hex
+        self._refresh_lock_script = redis.register_script(REFRESH_LOCK_SCRIPT)
+        self._release_lock_script = redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._lock_lost = False
+        self.min_dial_interval = 1 / calls_per_second if calls_per_second > 0 else 0
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        # Bounds the dial attempts in flight; may be shared by the dialers of one process
+        self.dial_slots = dial_slots or asyncio.Semaphore(DIALER_CONCURRENCY)
+        self.metrics = DialerMetrics()
+        self._last_dial_at: Optional[float] = None
+
+    async def run(self) -> DialerMetrics:
+        # Only one dialer may run per campaign
+        if not await self.redis.set(self.lock_key, self.lock_token, nx=True, ex=DIALER_LOCK_TTL):
+            log.info(f"Dialer already running for campaign_id: {self.campaign_id}")
+            return self.metrics
+
+        log.info(f"Starting dialer for campaign_id: {self.campaign_id}")
+        heartbeat = asyncio.create_task(self._hold_lock())
+        try:
+            while not self._lock_lost and await self.step():
+                continue
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await self._release_lock_script(keys=[self.lock_key], args=[self.lock_token])
+        log.info(f"Stopped dialer for campaign_id: {self.campaign_id}. {self.metrics}")
+        return self.metrics
+
+    async def _hold_lock(self):
+        """Refresh the lock's TTL every third of it for as long as the dialer runs, so a
+        step taking longer than the TTL does not let a second dialer in"""
+        while True:
+            await asyncio.sleep(DIALER_LOCK_TTL / 3)
+            try:
+                refreshed = await self._refresh_lock_script(
+                    keys=[self.lock_key], args=[self.lock_token, DIALER_LOCK_TTL]
+                )
+            except Exception as e:
+                # Retried on the next beat, well before the TTL runs out
+                log.error(f"Error refreshing dialer lock for campaign_id: {self.campaign_id}: {e}")
+                continue
+            if not refreshed:
+                log.error(f"Dialer lost its lock for campaign_id: {self.campaign_id}. Stopping.")
+                self._lock_lost = True
+                return
+
+    async def step(self) -> bool:
+        """Run a single iteration of the loop. Returns False once the dialer should stop."""
+        campaign = await CampaignRepository(self.db).get(id=self.campaign_id)
+        if campaign.status != CampaignStatus.RUNNING.value:
+            log.info(f"Campaign_id: {self.campaign_id} is {campaign.status}. Stopping dialer.")
+            return False
+
+        if self._has_ended(campaign):
+            await self._end_campaign()
+            return False
+
+        await self._requeue_retryable_calls(campaign)
+
+        calls = await CallRepository(self.db).list(
+            where=[Call.campaign_id == self.campaign_id, Call.status == CallStatus.PENDING.value],
+            order_by=[Call.retry_count, Call.created_at],
+            limit=self.batch_size,
+        )
+        if len(calls) == 0:
+            if not await self._has_unfinished_calls(campaign):
+                log.info(f"No calls left to dial for campaign_id: {self.campaign_id}")
+                return False
+            await asyncio.sleep(self.poll_interval)
+            return True
+
+        dials = []
+        for call in calls:
+            if self._lock_lost:
+                break
+            # Waited for before the call is claimed: the slots are shared across campaigns,
+            # and a call claimed and leased while waiting could time out before being dialed
+            await self.dial_slots.acquire()
+            await self._pace()
+            # Taken by another dialer or an outbound call task since it was listed
+            if not await CallRepository(self.db).claim_for_dialing(call.id):
+                self.dial_slots.release()
+                continue
+            if not await self.channel_semaphore.acquire(call.id):
+                await CallRepository(self.db).unclaim_for_dialing(call.id)
+                self.dial_slots.release()
+                self.metrics.channel_waits += 1
+                break
+
+            dials.append(asyncio.create_task(self._dial(call)))
+        await asyncio.gather(*dials)
+
+        log.info(f"Dialer for campaign_id: {self.campaign_id}. {self.metrics}")
+        if len(dials) < len(calls):
+            await asyncio.sleep(self.poll_interval)
+        return True
+
+    async def _dial(self, call: CallDBSchema):
+        try:
+            succeeded = await self.dial_call(call)
+        except Exception as e:
+            log.error(f"Error dialing call_id: {call.id}: {e}")
+            succeeded = False
+        finally:
+            self.dial_slots.release()
+
+        self.metrics.dialed += 1
+        if not succeeded:
+            self.metrics.failed += 1
+
+    async def _pace(self):
+        if self._last_dial_at is not None:
+            wait = self._last_dial_at + self.min_dial_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        self._last_dial_at = time.monotonic()
+
+    def _has_ended(self, campaign: CampaignDBSchema) -> bool:
+        if not campaign.end_date:
+            return False
+        end_date = campaign.end_date
+        if isinstance(end_date, str):
+            end_date = datetime.fromisoformat(end_date)
+        return datetime.utcnow() >= end_date.replace(tzinfo=None)
+
+    async def _end_campaign(self):
+        log.info(f"Campaign_id: {self.campaign_id} has passed its end date. Stopping dialer.")
+        try:
+            await CallRepository(self.db).update(
+                values={"status": CallStatus.CANCELLED.value},
+                campaign_id=self.campaign_id,
+                status=CallStatus.PENDING.value,
+            )
+        except RecordNotFoundException:
+            pass
+        await CampaignRepository(self.db).update(
+            values={"status": CampaignStatus.IDLE.value}, id=self.campaign_id
+        )
+
+    async def _requeue_retryable_calls(self, campaign: CampaignDBSchema):
+        if campaign.max_retries <= 0:
+            return
+        older_timestamp = datetime.utcnow() - timedelta(seconds=CALL_RETRY_INTERVAL)
+        try:
+            self.metrics.retried += await CallRepository(self.db).update(
+                values={
+                    "status": CallStatus.PENDING.value,
+                    "retry_count": Call.retry_count + 1,
+                },
+                where=[
+                    Call.campaign_id == self.campaign_id,
+                    Call.status.in_(RETRYABLE_CALL_STATUSES),
+                    Call.retry_count < campaign.max_retries,
+                    Call.updated_at <= older_timestamp,
+                ],
+            )
+        except RecordNotFoundException:
+            pass
+
+    async def _has_unfinished_calls(self, campaign: CampaignDBSchema) -> bool:
+        """Calls still in flight, or waiting out the retry interval, may become dialable again"""
+        where = [Call.campaign_id == self.campaign_id]
+        if campaign.max_retries > 0:
+            where.append(
+                Call.status.in_(ACTIVE_CALL_STATUSES)
+                | (
+                    Call.status.in_(RETRYABLE_CALL_STATUSES)
+                    & (Call.retry_count < campaign.max_retries)
+                )
+            )
+        else:
+            where.append(Call.status.in_(ACTIVE_CALL_STATUSES))
+        return await CallRepository(self.db).count(where=where) > 0
+
+
+class AsyncDialerWorker:
+    """Runs a CampaignDialer for every RUNNING campaign inside a single process.
+
+    Dialing is almost entirely waiting on the telephony provider and Postgres, so one
+    event loop can keep hundreds of dial attempts in flight; `concurrency` bounds them
+    across all campaigns.
+    """
+
+    def __init__(
+        self,
+        dial_call: DialCall,
+        concurrency: int = DIALER_CONCURRENCY,
+        poll_interval: float = DIALER_POLL_INTERVAL,
+    ):
+        self.dial_call = dial_call
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.dial_slots = asyncio.Semaphore(concurrency)
+        self._dialers: dict[str, asyncio.Task] = {}
+
+    async def run(self):
+        log.info(f"Starting async dialer worker with concurrency: {self.concurrency}")
+        try:
+            while True:
+                await self.start_dialers()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            for task in self._dialers.values():
+                task.cancel()
+            await asyncio.gather(*self._dialers.values(), return_exceptions=True)
+
+    async def start_dialers(self):
+        async with AsyncDBSession() as db:
+            campaigns = await CampaignRepository(db).list(status=CampaignStatus.RUNNING.value)
+
+        for campaign in campaigns:
+            if campaign.id in self._dialers:
+                continue
+            task = asyncio.create_task(self._run_dialer(campaign.id))
+            task.add_done_callback(
+                lambda _, campaign_id=campaign.id: self._dialers.pop(campaign_id)
+            )
+            self._dialers[campaign.id] = task
+
+    async def _run_dialer(self, campaign_id: str):
+        try:
+            async with AsyncDBSession() as db:
+                await CampaignDialer(
+                    db, campaign_id, dial_call=self.dial_call, dial_slots=self.dial_slots
+                ).run()
+        except Exception as e:
+            log.error(f"Dialer for campaign_id: {campaign_id} failed: {e}")
@@ -1,74 +1,331 @@
+import asyncio
 import csv
-from io import StringIO
+import io
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, AsyncIterator, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession
+import billiard
+import httpx
 from supabase._async.client import AsyncClient as SupabaseClient
 
 from auth import get_supabase
 from celeryworker import celery_app
 from config import (
+    CUSTOMER_SET_CHUNK_SIZE,
+    CUSTOMER_SET_DELETE_BATCH_SIZE,
+    CUSTOMER_SET_DELETE_RETRY_INTERVAL,
+    CUSTOMER_SET_PARSE_RANGE_SIZE,
+    CUSTOMER_SET_PARSE_WORKERS,
     SUPABASE_CUSTOMER_SET_BUCKET_NAME,
 )
 from constants import CustomerSetStatus
+from exceptions import DatabaseException
 from log import log
-from models import get_db
+from models import AsyncDBSession, CustomerSet
 from repositories import CustomerRepository, CustomerSetRepository
-from schemas import CustomerDBInputSchema
 from util.asyncio import async_to_sync
+from util.customer_csv import (
+    ParsedCustomerRows,
+    count_csv_range,
+    count_csv_rows,
+    parse_csv_range,
+    parse_customer_rows,
+    read_csv_chunks,
+    split_csv_file,
+)
+from util.supabase_client import download_stream
+
+ERROR_FILE_FIELDS = ["row", "error"]
+
+# The processes of celery's prefork pool are daemonic, and multiprocessing refuses to
+# start children from a daemonic process. billiard, the pool's fork of multiprocessing,
+# does not, so the parse pool's processes are started through it.
+PARSE_POOL_CONTEXT = billiard.get_context("fork")
 
 
-@celery_app.task(name="process_csv_file")
+@celery_app.task(
+    name="process_csv_file",
+    acks_late=True,
+    autoretry_for=(DatabaseException, httpx.HTTPError),
+    max_retries=5,
+    retry_backoff=True,
+)
 def process_csv_file_task(customer_set_id: str):
     async_to_sync(process_csv_file, customer_set_id)
 
 
 async def process_csv_file(customer_set_id: str):
+    """Load the customer set's CSV chunk by chunk: CUSTOMER_SET_CHUNK_SIZE rows at a time,
+    or one byte range at a time when parsed by CUSTOMER_SET_PARSE_WORKERS processes.
+
+    `processed_count` is the checkpoint: it is only advanced once a chunk has been
+    committed, and a set left PROCESSING by a crashed or retried job resumes after it.
+    Rows before the checkpoint are still validated, which rebuilds the error file and
+    `failed_count` without loading them again."""
     log.info(f"Processing CSV file for customer_set_id: {customer_set_id}")
 
-    db_gen = get_db()
-    db: AsyncSession = await db_gen.__anext__()
+    async with AsyncDBSession() as db:
+        supabase: SupabaseClient = await get_supabase()
+        created_by = "system"
 
-    supabase: SupabaseClient = await get_supabase()
-    created_by = "system"
+        customer_set = await CustomerSetRepository(db).get_by_id(customer_set_id)
+        if customer_set.status == CustomerSetStatus.DELETING.value:
+            log.info(f"Customer_set_id: {customer_set_id} is being deleted, not processing it")
+            return
+        resume_from = 0
+        if customer_set.status == CustomerSetStatus.PROCESSING.value:
+            resume_from = customer_set.processed_count
+            log.info(f"Resuming customer_set_id: {customer_set_id} after row {resume_from}")
 
-    customer_set = await CustomerSetRepository(db).get(id=customer_set_id)
+        with tempfile.NamedTemporaryFile() as file, tempfile.TemporaryFile() as error_file:
+            await download_customer_set_file(customer_set.url, file)
+            parser = (
+                ParallelCustomerCSVParser(file.name, CUSTOMER_SET_PARSE_WORKERS)
+                if CUSTOMER_SET_PARSE_WORKERS > 1
+                else CustomerCSVParser(file)
+            )
+            total_count = await parser.count_rows()
+            # Unless it was deleted meanwhile: a PROCESSING set cannot be deleted, so no
+            # row is loaded into a set being deleted
+            if not await CustomerSetRepository(db).update_returning(
+                {
+                    "status": CustomerSetStatus.PROCESSING.value,
+                    "processed_count": resume_from,
+                    "total_count": total_count,
+                    "error_url": None,
+                },
+                returning=CustomerSet.id,
+                where=[
+                    CustomerSet.id == customer_set.id,
+                    CustomerSet.status != CustomerSetStatus.DELETING.value,
+                ],
+            ):
+                log.info(f"Customer_set_id: {customer_set_id} is being deleted, not processing it")
+                return
 
-    file = await supabase.storage.from_(SUPABASE_CUSTOMER_SET_BUCKET_NAME).download(
-        customer_set.url
-    )
+            error_writer = ErrorFileWriter(error_file)
+            last_row_number = 0
+            async for parsed in parser.parse():
+                for row_number, error, row in parsed.errors:
+                    error_writer.write(row_number, error, row)
 
-    content = file.decode()
-    str_content = StringIO(content)
-    csv_file = csv.DictReader(str_content)
-
-    deduped_customers = {}
-    for row in csv_file:
-        mobile_number = row.get("mobile_number")
-        if mobile_number in deduped_customers:
-            deduped_customers[mobile_number] = {**deduped_customers[mobile_number], **row}
-        else:
-            deduped_customers[mobile_number] = row
-
-    customers = []
-    for row in deduped_customers.values():
-        name = row.pop("name")
-        mobile_number = row.pop("mobile_number")
-        metadata = row
-        customer = CustomerDBInputSchema(
-            organization_id=customer_set.organization_id,
-            customer_set_id=customer_set.id,
-            name=name,
-            mobile_number=mobile_number,
-            customer_metadata=metadata,
-            created_by=created_by,
-            updated_by=created_by,
+                last_row_number += parsed.row_count
+                if last_row_number <= resume_from:
+                    continue
+
+                customers = [
+                    (
+                        customer_set.organization_id,
+                        customer_set.id,
+                        name,
+                        mobile_number,
+                        metadata,
+                        created_by,
+                        created_by,
+                    )
+                    for row_number, name, mobile_number, metadata in parsed.customers
+                    if row_number > resume_from
+                ]
+                if customers:
+                    await CustomerRepository(db).copy_upsert(customers)
+
+                await CustomerSetRepository(db).update_by_id(
+                    customer_set.id,
+                    {
+                        "processed_count": last_row_number,
+                        "failed_count": error_writer.count,
+                    },
+                )
+                log.info(
+                    f"Processed {last_row_number}/{total_count} rows "
+                    f"for customer_set_id: {customer_set_id}"
+                )
+
+            error_url = None
+            if error_writer.count > 0:
+                error_url = await upload_error_file(supabase, customer_set.id, error_writer)
+
+        await CustomerSetRepository(db).update_by_id(
+            customer_set.id,
+            {
+                "status": CustomerSetStatus.PROCESSED.value,
+                "processed_count": total_count,
+                "failed_count": error_writer.count,
+                "error_url": error_url,
+            },
+        )
+        log.info(
+            f"Processed customer_set_id: {customer_set_id}. "
+            f"Rows: {total_count}, failed: {error_writer.count}"
         )
-        customers.append(customer)
 
-    await CustomerRepository(db).bulk_create(
-        customers,
-        on_conflict=lambda q: {"constraint": "customer_set_id_mobile_number_uc"},
+
+@celery_app.task(
+    name="delete_customer_set",
+    acks_late=True,
+    autoretry_for=(DatabaseException,),
+    max_retries=5,
+    retry_backoff=True,
+)
+def delete_customer_set_task(customer_set_id: str, user_id: str):
+    async_to_sync(delete_customer_set, customer_set_id, user_id)
+
+
+async def delete_customer_set(customer_set_id: str, user_id: str):
+    """Soft delete the customers of a DELETING customer set in batches of
+    CUSTOMER_SET_DELETE_BATCH_SIZE, reporting progress in `processed_count` of
+    `total_count`, then the set itself once none are left. A retried job continues with
+    the customers left."""
+    log.info(f"Deleting customer_set_id: {customer_set_id}")
+
+    async with AsyncDBSession() as db:
+        total_count = await CustomerRepository(db).count(customer_set_id=customer_set_id)
+        await CustomerSetRepository(db).update_by_id(
+            customer_set_id, {"processed_count": 0, "total_count": total_count}
+        )
+
+        deleted_count = 0
+        while True:
+            deleted = await CustomerRepository(db).soft_delete_batch(
+                _user_id=user_id,
+                batch_size=CUSTOMER_SET_DELETE_BATCH_SIZE,
+                customer_set_id=customer_set_id,
+            )
+            if not deleted:
+                # The batch skips rows locked by other transactions, so none deleted
+                # does not mean none are left
+                if not await CustomerRepository(db).count(customer_set_id=customer_set_id):
+                    break
+                await asyncio.sleep(CUSTOMER_SET_DELETE_RETRY_INTERVAL)
+                continue
+            deleted_count += deleted
+            await CustomerSetRepository(db).update_by_id(
+                customer_set_id, {"processed_count": deleted_count}
+            )
+            log.info(
+                f"Deleted {deleted_count}/{total_count} customers "
+                f"for customer_set_id: {customer_set_id}"
+            )
+
+        await CustomerSetRepository(db).delete(_user_id=user_id, id=customer_set_id)
+        log.info(f"Deleted customer_set_id: {customer_set_id}")
+
+
+class ErrorFileWriter:
+    """Collects rejected rows, with their row number and reason, into a CSV file"""
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self.text_file = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        self.writer: Optional[csv.DictWriter] = None
+        self.count = 0
+
+    def write(self, row_number: int, error: str, row: dict):
+        if self.writer is None:
+            self.writer = csv.DictWriter(
+                self.text_file,
+                fieldnames=[*ERROR_FILE_FIELDS, *[key for key in row if key is not None]],
+                extrasaction="ignore",
+            )
+            self.writer.writeheader()
+        self.writer.writerow({**row, "row": row_number, "error": error})
+        self.count += 1
+
+    def read(self) -> bytes:
+        self.text_file.flush()
+        self.file.seek(0)
+        return self.file.read()
+
+
+async def download_customer_set_file(path: str, file: IO[bytes]):
+    """Stream the uploaded file into `file` instead of holding it in memory, over the
+    process's pooled storage connections"""
+    async for chunk in download_stream(SUPABASE_CUSTOMER_SET_BUCKET_NAME, path):
+        file.write(chunk)
+    file.seek(0)
+
+
+async def upload_error_file(
+    supabase: SupabaseClient, customer_set_id: str, error_writer: ErrorFileWriter
+) -> str:
+    path = f"{customer_set_id}.errors.csv"
+    await supabase.storage.from_(SUPABASE_CUSTOMER_SET_BUCKET_NAME).upload(
+        file=error_writer.read(),
+        path=path,
+        file_options={"content-type": "text/csv", "x-upsert": "true"},
     )
+    return path
+
+
+class CustomerCSVParser:
+    """Parses the file on the event loop in chunks of CUSTOMER_SET_CHUNK_SIZE rows"""
+
+    def __init__(self, file: IO[bytes], chunk_size: int = CUSTOMER_SET_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+
+    async def count_rows(self) -> int:
+        return count_csv_rows(self.file)
+
+    async def parse(self) -> AsyncIterator[ParsedCustomerRows]:
+        self.file.seek(0)
+        for rows in read_csv_chunks(self.file, self.chunk_size):
+            yield parse_customer_rows(rows)
+
+
+class ParallelCustomerCSVParser:
+    """Splits the file into byte ranges of CUSTOMER_SET_PARSE_RANGE_SIZE on row boundaries
+    and parses them in a process pool, which can be started from a prefork worker.
+
+    Ranges are yielded in file order with file row numbers, and at most two per worker
+    are parsed ahead of the consumer, so memory stays bounded while the database load
+    overlaps with parsing."""
+
+    def __init__(self, path: str, workers: int, range_size: int = CUSTOMER_SET_PARSE_RANGE_SIZE):
+        self.path = path
+        self.workers = workers
+        with open(path, "rb") as file:
+            self.fieldnames, self.ranges = split_csv_file(file, range_size)
+
+    def executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, mp_context=PARSE_POOL_CONTEXT)
+
+    async def count_rows(self) -> int:
+        loop = asyncio.get_running_loop()
+        with self.executor() as executor:
+            counts = await asyncio.gather(
+                *[
+                    loop.run_in_executor(executor, count_csv_range, self.path, start, end)
+                    for start, end in self.ranges
+                ]
+            )
+        return sum(counts)
+
+    async def parse(self) -> AsyncIterator[ParsedCustomerRows]:
+        loop = asyncio.get_running_loop()
+        with self.executor() as executor:
+            ranges = iter(self.ranges)
+            pending = deque()
+
+            def submit_next():
+                next_range = next(ranges, None)
+                if next_range:
+                    start, end = next_range
+                    pending.append(
+                        loop.run_in_executor(
+                            executor, parse_csv_range, self.path, start, end, self.fieldnames
+                        )
+                    )
+
+            for _ in range(self.workers * 2):
+                submit_next()
 
-    customer_set.status = CustomerSetStatus.PROCESSED
-    await CustomerSetRepository(db).update(customer_set, id=customer_set.id)
+            row_offset = 0
+            while pending:
+                parsed: ParsedCustomerRows = await pending.popleft()
+                submit_next()
+                parsed.renumber(row_offset)
+                row_offset += parsed.row_count
+                yield parsed
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text, text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 
-from constants import CallStatus
+from constants import TRANSCRIPT_SEARCH_CONFIG, CallStatus
 
 from .audit import AuditMixin
 from .base import Base, BaseMeta
@@ -11,6 +11,43 @@ from .base import Base, BaseMeta
 
 class Call(Base, AuditMixin, metaclass=BaseMeta):
     __tablename__ = "call"
+    __table_args__ = (
+        Index(
+            "ix_call_organization_id_created_at_id",
+            "organization_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_call_organization_id_campaign_id_created_at_id",
+            "organization_id",
+            "campaign_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_call_organization_id_status_created_at_id",
+            "organization_id",
+            "status",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_call_organization_id_to_number",
+            "organization_id",
+            "to_number",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_call_transcript_search",
+            text(f"to_tsvector('{TRANSCRIPT_SEARCH_CONFIG}'::regconfig, transcript)"),
+            postgresql_using="gin",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id = Column(
         Text,
@@ -33,12 +70,9 @@ class Call(Base, AuditMixin, metaclass=BaseMeta):
     transcript = Column(Text, nullable=True)
     actions = Column(JSONB, nullable=True)
 
+    call_config_id = Column(Text, ForeignKey("call_config.id"), nullable=False, index=True)
     telephony_service_id = Column(Text, ForeignKey("telephony_service.id"), nullable=False)
-    telephony_service_config = Column(JSONB, nullable=False)
     transcriber_id = Column(Text, ForeignKey("transcriber.id"),nullable=False)
-    transcriber_config = Column(JSONB, nullable=False, default={})
     agent_id = Column(Text, ForeignKey("agent.id"), nullable=False)
-    agent_config = Column(JSONB, nullable=False, default={})
     synthesizer_id = Column(Text, ForeignKey("synthesizer.id"), nullable=False)
-    synthesizer_config = Column(JSONB, nullable=False, default={})
 
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import Column, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .audit import AuditMixin
+from .base import Base, BaseMeta
+
+
+class CallConfig(Base, AuditMixin, metaclass=BaseMeta):
+    """Resolved, immutable call configuration snapshot, addressed by the hash of its content"""
+
+    __tablename__ = "call_config"
+
+    id = Column(Text, nullable=False, primary_key=True)
+    version = Column(Integer, nullable=False)
+    telephony_service_config = Column(JSONB, nullable=False)
+    transcriber_config = Column(JSONB, nullable=False, default={})
+    agent_config = Column(JSONB, nullable=False, default={})
+    synthesizer_config = Column(JSONB, nullable=False, default={})
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text, text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
@@ -11,6 +11,15 @@ from .campaign_customer_set import CampaignCustomerSet
 
 class Campaign(Base, AuditMixin, metaclass=BaseMeta):
     __tablename__ = "campaign"
+    __table_args__ = (
+        Index(
+            "ix_campaign_organization_id_created_at_id",
+            "organization_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id = Column(
         Text,
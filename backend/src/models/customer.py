@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from sqlalchemy import Column, ForeignKey, Text, UniqueConstraint, text
+from sqlalchemy import Column, ForeignKey, Index, Text, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import JSONB
 
 from .audit import AuditMixin
@@ -11,6 +11,20 @@ class Customer(Base, AuditMixin, metaclass=BaseMeta):
     __tablename__ = "customer"
     __table_args__ = (
         UniqueConstraint("customer_set_id", "mobile_number", name="customer_set_id_mobile_number_uc"),
+        Index(
+            "ix_customer_organization_id_created_at_id",
+            "organization_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_customer_customer_set_id_created_at_id",
+            "customer_set_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
     )
 
     id = Column(
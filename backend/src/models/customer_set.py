@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from sqlalchemy import Column, ForeignKey, Text, text
+from sqlalchemy import Column, ForeignKey, Index, Integer, Text, text
 
 from .audit import AuditMixin
 from .base import Base, BaseMeta
@@ -8,6 +8,15 @@ from .base import Base, BaseMeta
 
 class CustomerSet(Base, AuditMixin, metaclass=BaseMeta):
     __tablename__ = "customer_set"
+    __table_args__ = (
+        Index(
+            "ix_customer_set_organization_id_created_at_id",
+            "organization_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id = Column(
         Text,
@@ -21,4 +30,8 @@ class CustomerSet(Base, AuditMixin, metaclass=BaseMeta):
     type = Column(Text, nullable=False)
     status = Column(Text, nullable=False)
     url = Column(Text, nullable=True)
+    total_count = Column(Integer, nullable=True)
+    processed_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    failed_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    error_url = Column(Text, nullable=True)
 
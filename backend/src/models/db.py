@@ -3,9 +3,15 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from config import ASYNC_DB_URI
+from config import ASYNC_DB_URI, POSTGRES
 
-engine = create_async_engine(ASYNC_DB_URI, echo=False, pool_pre_ping=True)
+engine = create_async_engine(
+    ASYNC_DB_URI,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=int(POSTGRES["min_size"]),
+    max_overflow=int(POSTGRES["max_size"]) - int(POSTGRES["min_size"]),
+)
 AsyncDBSession = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
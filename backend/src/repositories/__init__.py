@@ -2,6 +2,7 @@ from .organization import OrganizationRepository
 from .user import UserRepository
 from .agent import AgentRepository
 from .call import CallRepository
+from .call_config import CallConfigRepository
 from .campaign import CampaignRepository
 from .campaign_customer_set import CampaignCustomerSetRepository
 from .customer import CustomerRepository
@@ -1,14 +1,28 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import json
 from abc import ABCMeta, abstractmethod
-from typing import Any, Callable, Generic, List, Optional, Tuple, Type, TypeVar
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Generic,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+)
 
-from sqlalchemy import Column, delete, desc, func, select, update
+from sqlalchemy import Column, bindparam, delete, desc, func, select, tuple_, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.engine import CursorResult, Result
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
+from sqlalchemy.sql import ClauseElement, Executable, Select
 
-from constants import CursorPrefix
+from config import COUNT_CACHE_TTL
+from constants import CountStrategy, CursorPrefix
 from exceptions import (
     ApplicationException,
     DatabaseException,
@@ -18,6 +32,15 @@ from exceptions import (
 from log import log
 from models import Base
 from schemas import BaseSchema
+from util.pagination import Cursor, Page
+from util.redis_client import REDIS_CLIENT
+
+COUNT_CACHE_KEY = "count:{table}:{digest}"
+
+# Statements of the by-id fast paths, keyed by the table, the operation and the filtered
+# and updated columns. Executing the same statement object reuses SQLAlchemy's compiled
+# form and gives the same SQL text every time, which asyncpg keeps prepared per connection.
+_BY_ID_STATEMENTS: dict[tuple, Executable] = {}
 
 IN_SCHEMA = TypeVar("IN_SCHEMA", bound=BaseSchema)
 SCHEMA = TypeVar("SCHEMA", bound=BaseSchema)
@@ -51,7 +74,8 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
         items: list[IN_SCHEMA],
         ignore_conflicts: Optional[bool] = False,
         on_conflict: Optional[Callable] = None,
-    ) -> SCHEMA:
+        returning: Optional[List] = None,
+    ) -> Result:
         try:
             q = insert(self._table)
             q = q.values([item.dict() for item in items])
@@ -63,6 +87,9 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
                 else:
                     q = q.on_conflict_do_nothing(**on_conflict_args)
 
+            if returning:
+                q = q.returning(*returning)
+
             result: Result = await self._db_session.execute(q)
             await self._db_session.commit()
             return result
@@ -74,8 +101,13 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
     async def count(
         self,
         where: Optional[List] = None,
+        strategy: CountStrategy = CountStrategy.EXACT,
         **filter_query: Any,
     ) -> int:
+        """EXACT scans the matching rows. CACHED shares an exact count for COUNT_CACHE_TTL
+        seconds through Redis, keyed by the query and its parameters, so by organization
+        and filters. ESTIMATE returns the planner's row estimate without scanning, which
+        can be off by the error of the table statistics."""
         try:
             q = select(func.count()).select_from(self._table)
 
@@ -85,12 +117,46 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
                 q = q.filter_by(**filter_query, deleted_at=None)
 
             q = q.order_by(None)
+            if strategy == CountStrategy.ESTIMATE:
+                return await self._estimate_count(q.with_only_columns(self._table.id))
+
+            cache_key = None
+            if strategy == CountStrategy.CACHED:
+                compiled = q.compile(dialect=self._db_session.bind.dialect)
+                digest = hashlib.sha256(f"{compiled}{sorted(compiled.params.items())}".encode())
+                cache_key = COUNT_CACHE_KEY.format(
+                    table=self._table.__tablename__, digest=digest.hexdigest()
+                )
+                cached_count = await REDIS_CLIENT.get(cache_key)
+                if cached_count is not None:
+                    return int(cached_count)
+
             result: Result = await self._db_session.execute(q)
             count = result.scalars().one()
+            if cache_key:
+                await REDIS_CLIENT.set(cache_key, count, ex=COUNT_CACHE_TTL)
             return count
         except Exception as e:
             raise DatabaseException(e)
 
+    async def _estimate_count(self, q: Select) -> int:
+        plan = await self.explain(q)
+        return int(plan["Plan Rows"])
+
+    async def explain(self, q: Select) -> dict:
+        """Top node of the query plan for `q`. EXPLAIN goes through the driver, so the
+        query is compiled with its parameters bound positionally."""
+        connection = await self._db_session.connection()
+        compiled = q.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        params = [compiled.params[name] for name in compiled.positiontup]
+        raw_connection = await connection.get_raw_connection()
+        plan = await raw_connection.driver_connection.fetchval(
+            f"EXPLAIN (FORMAT JSON) {compiled}", *params
+        )
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
     async def list(
         self,
         where: Optional[List] = None,
@@ -99,10 +165,13 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
         offset: int = 0,
         load_relationships: Optional[List] = None,
         raise_if_no_records: bool = False,
+        projection: Optional[Type[BaseSchema]] = None,
         **filter_query: Any,
     ) -> list[SCHEMA]:
+        """With a `projection`, only the columns of its fields are selected and entries
+        are returned as the projection, so unused TEXT and JSONB columns are never read"""
         try:
-            q = select(self._table)
+            q = select(*self._projection_columns(projection)) if projection else select(self._table)
 
             if where:
                 q = q.where(*where, self._table.deleted_at == None)  # NOSONAR  # noqa
@@ -122,9 +191,11 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
                 q = q.offset(offset)
 
             result: Result = await self._db_session.execute(q)
-            entries = result.scalars().all()
+            entries = result.mappings().all() if projection else result.scalars().all()
             if len(entries) == 0:
                 raise NoResultFound(f"{self._table.__name__}<{filter_query}> not found")
+            if projection:
+                return [projection(**entry) for entry in entries]
             return [self._schema.from_orm(entry) for entry in entries]
         except NoResultFound as e:
             if raise_if_no_records:
@@ -134,51 +205,131 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
         except Exception as e:
             raise DatabaseException(e)
 
+    async def stream(
+        self,
+        where: Optional[List] = None,
+        order_by: Optional[List] = None,
+        batch_size: int = 1000,
+        **filter_query: Any,
+    ) -> AsyncIterator[List[SCHEMA]]:
+        """Yield matching entries in batches of `batch_size` using a server-side cursor,
+        so memory use does not depend on the number of matching rows"""
+        try:
+            q = select(self._table)
+
+            if where:
+                q = q.where(*where, self._table.deleted_at == None)  # NOSONAR  # noqa
+            else:
+                q = q.filter_by(**filter_query, deleted_at=None)
+
+            if order_by:
+                q = q.order_by(*order_by)
+
+            q = q.execution_options(yield_per=batch_size)
+            result: AsyncScalarResult = await self._db_session.stream_scalars(q)
+            async for entries in result.partitions():
+                yield [self._schema.from_orm(entry) for entry in entries]
+        except Exception as e:
+            raise DatabaseException(e)
+
     async def list_with_pagination(
         self,
-        where: List,
         limit: int,
-        cursor_prefix: Optional[CursorPrefix],
-        cursor_value: Optional[Any],
-        cursor_field: Column,
-        order_by: List = [],
+        cursor: Optional[Cursor] = None,
+        where: Optional[List] = None,
+        count_strategy: Optional[CountStrategy] = None,
         load_relationships: Optional[List] = None,
-        raise_if_no_records: bool = False,
-    ) -> Tuple[List[SCHEMA], int, bool]:
+        projection: Optional[Type[BaseSchema]] = None,
+        **filter_query: Any,
+    ) -> Page[SCHEMA]:
+        """List a page of at most `limit` entries, newest first, using a keyset on
+        (created_at, id) instead of an offset so every page costs the same and can use
+        the (organization_id, created_at, id) indexes. The total count needs its own
+        query and is only run with a `count_strategy`. A `projection` works as in
+        `list`."""
         try:
-            paginated_where = [*where]
-            paginated_order_by = [*order_by]
-
-            if cursor_prefix == CursorPrefix.NEXT:
-                paginated_order_by.append(cursor_field)
-                paginated_where.append(cursor_field > cursor_value)
-            elif cursor_prefix == CursorPrefix.PREV:
-                paginated_order_by.append(desc(cursor_field))
-                paginated_where.append(cursor_field < cursor_value)
-
-            count = await self.count(where=where)
-            entries = await self.list(
-                where=paginated_where,
-                limit=limit + 1,
-                order_by=paginated_order_by,
+            q = self.page_query(
+                limit,
+                cursor=cursor,
+                where=where,
                 load_relationships=load_relationships,
-                raise_if_no_records=raise_if_no_records,
+                projection=projection,
+                **filter_query,
             )
+            backwards = cursor is not None and cursor.prefix == CursorPrefix.PREV
+            result: Result = await self._db_session.execute(q)
+            if projection:
+                rows = result.mappings().all()
+                positions = [(row["created_at"], row["id"]) for row in rows]
+                entries = [projection(**row) for row in rows]
+            else:
+                rows = result.scalars().all()
+                positions = [(row.created_at, row.id) for row in rows]
+                entries = [self._schema.from_orm(row) for row in rows]
 
-            has_more_entries = False
-            if len(entries) == limit + 1:
-                has_more_entries = True
-                entries.pop()
-
-            if cursor_prefix == CursorPrefix.PREV:
+            has_more_entries = len(entries) > limit
+            entries, positions = entries[:limit], positions[:limit]
+            if backwards:
                 entries.reverse()
-
-            return entries, count, has_more_entries
+                positions.reverse()
+
+            page = Page(entries)
+            if entries:
+                if has_more_entries or backwards:
+                    page.next_cursor = Cursor(CursorPrefix.NEXT, *positions[-1]).encode()
+                if (has_more_entries and backwards) or (cursor is not None and not backwards):
+                    page.prev_cursor = Cursor(CursorPrefix.PREV, *positions[0]).encode()
+
+            if count_strategy:
+                page.count = await self.count(where=where, strategy=count_strategy, **filter_query)
+            return page
         except ApplicationException:
             raise
         except Exception as e:
             raise DatabaseException(e)
 
+    def page_query(
+        self,
+        limit: int,
+        cursor: Optional[Cursor] = None,
+        where: Optional[List] = None,
+        load_relationships: Optional[List] = None,
+        projection: Optional[Type[BaseSchema]] = None,
+        **filter_query: Any,
+    ) -> Select:
+        """The query `list_with_pagination` runs for a page, selecting one entry more
+        than `limit` to tell whether another page follows"""
+        if projection:
+            q = select(*self._projection_columns(projection, self._table.id, self._table.created_at))
+        else:
+            q = select(self._table)
+
+        if where:
+            q = q.where(*where, self._table.deleted_at == None)  # NOSONAR  # noqa
+        else:
+            q = q.filter_by(**filter_query, deleted_at=None)
+
+        if load_relationships:
+            q = q.options(*load_relationships)
+
+        keyset = tuple_(self._table.created_at, self._table.id)
+        backwards = cursor is not None and cursor.prefix == CursorPrefix.PREV
+        if cursor is not None:
+            position = tuple_(cursor.created_at, cursor.id)
+            q = q.where(keyset > position if backwards else keyset < position)
+
+        if backwards:
+            q = q.order_by(self._table.created_at, self._table.id)
+        else:
+            q = q.order_by(desc(self._table.created_at), desc(self._table.id))
+        return q.limit(limit + 1)
+
+    def _projection_columns(self, projection: Type[BaseSchema], *required: Column) -> List[Column]:
+        """Columns of the table named by the projection's fields, plus `required` ones"""
+        table_columns = self._table.__table__.columns
+        columns = [table_columns[name] for name in projection.model_fields if name in table_columns]
+        return [*columns, *[column for column in required if column.key not in projection.model_fields]]
+
     async def get(
         self,
         where: Optional[List] = None,
@@ -238,6 +389,120 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
         except Exception as e:
             raise DatabaseException(e)
 
+    async def update_returning(
+        self,
+        values: dict,
+        returning: Column,
+        where: Optional[List] = None,
+        **filter_query: Any,
+    ) -> List:
+        """`update` in a single UPDATE ... RETURNING, giving the `returning` column of
+        the entries it changed, which may be none. Unlike listing the entries first, an
+        entry another transaction changed in between is not returned."""
+        try:
+            q = update(self._table)
+            if where:
+                q = q.where(*where, self._table.deleted_at == None)  # NOSONAR  # noqa
+            else:
+                q = q.filter_by(**filter_query, deleted_at=None)
+
+            result: Result = await self._db_session.execute(q.values(**values).returning(returning))
+            updated = result.scalars().all()
+            await self._db_session.commit()
+            return updated
+        except IntegrityError as e:
+            raise RecordIntegrityException(e)
+        except Exception as e:
+            raise DatabaseException(e)
+
+    def _by_id_statement_supported(self) -> bool:
+        """The fast paths map rows straight into the schema, so every field must be a column"""
+        columns = self._table.__table__.columns
+        return all(name in columns for name in self._schema.model_fields)
+
+    def _get_by_id_statement(self, filter_names: tuple[str, ...]) -> Select:
+        key = (self._table, "get", filter_names)
+        statement = _BY_ID_STATEMENTS.get(key)
+        if statement is None:
+            table = self._table.__table__
+            statement = select(*[table.c[name] for name in self._schema.model_fields]).where(
+                table.c.id == bindparam("filter_id"),
+                *[table.c[name] == bindparam(f"filter_{name}") for name in filter_names],
+                table.c.deleted_at.is_(None),
+            )
+            _BY_ID_STATEMENTS[key] = statement
+        return statement
+
+    def _update_by_id_statement(
+        self, value_names: tuple[str, ...], filter_names: tuple[str, ...]
+    ) -> Executable:
+        key = (self._table, "update", value_names, filter_names)
+        statement = _BY_ID_STATEMENTS.get(key)
+        if statement is None:
+            table = self._table.__table__
+            statement = (
+                update(table)
+                .where(
+                    table.c.id == bindparam("filter_id"),
+                    *[table.c[name] == bindparam(f"filter_{name}") for name in filter_names],
+                    table.c.deleted_at.is_(None),
+                )
+                .values({name: bindparam(f"value_{name}") for name in value_names})
+            )
+            _BY_ID_STATEMENTS[key] = statement
+        return statement
+
+    async def get_by_id(self, id: str, **filter_query: Any) -> SCHEMA:
+        """`get(id=id, **filter_query)` with a cached Core statement, mapping the row
+        straight into the schema instead of going through the ORM identity map. Schemas
+        with relationship fields fall back to `get`."""
+        if not self._by_id_statement_supported():
+            return await self.get(id=id, **filter_query)
+
+        try:
+            filter_names = tuple(sorted(filter_query))
+            params = {"filter_id": id, **{f"filter_{name}": filter_query[name] for name in filter_names}}
+            result: Result = await self._db_session.execute(
+                self._get_by_id_statement(filter_names), params
+            )
+            entry = result.mappings().one_or_none()
+            if entry is None:
+                raise NoResultFound(f"{self._table.__name__}<id={id}, {filter_query}> not found")
+            return self._schema(**entry)
+        except NoResultFound as e:
+            raise RecordNotFoundException(e)
+        except Exception as e:
+            raise DatabaseException(e)
+
+    async def update_by_id(self, id: str, values: dict, **filter_query: Any) -> int:
+        """`update(values=values, id=id, **filter_query)` with a cached Core statement,
+        skipping the ORM's session synchronization. Values that are SQL expressions
+        can't be bound as parameters, so they fall back to `update`."""
+        if any(isinstance(value, ClauseElement) for value in values.values()):
+            return await self.update(values=values, id=id, **filter_query)
+
+        try:
+            value_names = tuple(sorted(values))
+            filter_names = tuple(sorted(filter_query))
+            params = {
+                "filter_id": id,
+                **{f"filter_{name}": filter_query[name] for name in filter_names},
+                **{f"value_{name}": values[name] for name in value_names},
+            }
+            cursor_result: CursorResult = await self._db_session.execute(
+                self._update_by_id_statement(value_names, filter_names), params
+            )
+            if cursor_result.rowcount == 0:
+                raise NoResultFound(f"{self._table.__name__}<id={id}, {filter_query}> not found")
+            await self._db_session.commit()
+            return cursor_result.rowcount
+        except NoResultFound as e:
+            raise RecordNotFoundException(e)
+        except IntegrityError as e:
+            raise RecordIntegrityException(e)
+        except Exception as e:
+            raise DatabaseException(e)
+
     async def delete(
         self,
         _user_id: str = "system",
@@ -255,21 +520,59 @@ class BaseRepository(Generic[IN_SCHEMA, SCHEMA, TABLE], metaclass=ABCMeta):
                     q = q.filter_by(**filter_query, deleted_at=None)
 
                 await self._db_session.execute(q)
+                await self._db_session.commit()
             else:
-                q = select(self._table)
+                q = self._soft_delete_statement(_user_id, unique_fields)
                 if where:
                     q = q.where(*where, self._table.deleted_at == None)  # NOSONAR  # noqa
                 else:
                     q = q.filter_by(**filter_query, deleted_at=None)
 
-                result: Result = await self._db_session.execute(q)
-                entries = result.scalars().all()
-                if len(entries) == 0:
+                cursor_result: CursorResult = await self._db_session.execute(q)
+                if cursor_result.rowcount == 0:
                     raise NoResultFound(f"{self._table.__name__}<{filter_query}> not found")
-                for entry in entries:
-                    await entry.delete(self._db_session, user_id=_user_id, unique_fields=unique_fields)
+                await self._db_session.commit()
             return None
         except NoResultFound as e:
             raise RecordNotFoundException(e)
         except Exception as e:
             raise DatabaseException(e)
+
+    async def soft_delete_batch(
+        self,
+        _user_id: str = "system",
+        batch_size: int = 1000,
+        where: Optional[List] = None,
+        unique_fields: List = [],
+        **filter_query: Any,
+    ) -> int:
+        """Soft delete at most `batch_size` matching entries and commit, returning how
+        many were deleted, 0 once none are left. Deleting a large set in batches keeps
+        each transaction and its row locks short."""
+        try:
+            batch = select(self._table.id)
+            if where:
+                batch = batch.where(*where, self._table.deleted_at == None)  # NOSONAR  # noqa
+            else:
+                batch = batch.filter_by(**filter_query, deleted_at=None)
+            batch = batch.limit(batch_size).with_for_update(skip_locked=True)
+
+            q = self._soft_delete_statement(_user_id, unique_fields).where(
+                self._table.id.in_(batch.scalar_subquery())
+            )
+            cursor_result: CursorResult = await self._db_session.execute(q)
+            await self._db_session.commit()
+            return cursor_result.rowcount
+        except Exception as e:
+            raise DatabaseException(e)
+
+    def _soft_delete_statement(self, user_id: str, unique_fields: List):
+        """Set-based equivalent of `Base.delete`: marks the rows deleted and suffixes
+        their `unique_fields` with the deletion time so the values can be reused. A NULL
+        value stays NULL, as NULL || text is NULL."""
+        now = datetime.utcnow()
+        suffix = f"__{now.strftime('%Y%m%d%H%M%S')}"
+        values = {"deleted_at": now, "updated_by": user_id}
+        for key in unique_fields:
+            values[key] = getattr(self._table, key) + suffix
+        return update(self._table).values(**values).execution_options(synchronize_session=False)
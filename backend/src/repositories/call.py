@@ -1,10 +1,18 @@
-from typing import Type
+from typing import List, Optional, Type
 
+from sqlalchemy import Select, func, literal_column
+
+from constants import TRANSCRIPT_SEARCH_CONFIG, CallStatus, CountStrategy
 from models import Call
-from schemas import CallDBInputSchema, CallDBSchema
+from schemas import BaseSchema, CallDBInputSchema, CallDBSchema, CallSearchFilters
+from util.customer_csv import normalize_mobile_number
+from util.pagination import Cursor, Page
 
 from .base import BaseRepository
 
+# A literal rather than a bound parameter, so the expression matches ix_call_transcript_search
+TRANSCRIPT_SEARCH_REGCONFIG = literal_column(f"'{TRANSCRIPT_SEARCH_CONFIG}'::regconfig")
+
 
 class CallRepository(BaseRepository[CallDBInputSchema, CallDBSchema, Call]):
     @property
@@ -18,3 +26,91 @@ class CallRepository(BaseRepository[CallDBInputSchema, CallDBSchema, Call]):
     @property
     def _table(self) -> Type[Call]:
         return Call
+
+    async def claim_for_dialing(self, call_id: str) -> bool:
+        """Move a PENDING call to DIALING in a single UPDATE ... RETURNING. When dialers
+        or outbound call tasks race for the same call, only the one this returns True
+        for may dial it."""
+        claimed = await self.update_returning(
+            values={"status": CallStatus.DIALING.value},
+            returning=Call.id,
+            where=[Call.id == call_id, Call.status == CallStatus.PENDING.value],
+        )
+        return len(claimed) > 0
+
+    async def unclaim_for_dialing(self, call_id: str) -> None:
+        """Put a claimed call that was not dialed back to PENDING"""
+        await self.update_returning(
+            values={"status": CallStatus.PENDING.value},
+            returning=Call.id,
+            where=[Call.id == call_id, Call.status == CallStatus.DIALING.value],
+        )
+
+    async def finish_dialing(self, call_id: str, status: CallStatus) -> bool:
+        """Move a DIALING call to the status its dial attempt ended in. False when it is
+        no longer DIALING, e.g. timed out while being dialed, and was left as it is."""
+        updated = await self.update_returning(
+            values={"status": status.value},
+            returning=Call.id,
+            where=[Call.id == call_id, Call.status == CallStatus.DIALING.value],
+        )
+        return len(updated) > 0
+
+    def search_conditions(self, organization_id: str, filters: CallSearchFilters) -> List:
+        """Conditions for the filters that are set. Each can be served by an index:
+        ix_call_organization_id_campaign_id_created_at_id, ..._status_created_at_id,
+        ..._created_at_id for the date range, ..._to_number, and the transcript's full
+        text index for keywords, which use websearch syntax ("quoted phrase", or, -word)."""
+        where = [Call.organization_id == organization_id]
+        if filters.campaign_id:
+            where.append(Call.campaign_id == filters.campaign_id)
+        if filters.status:
+            where.append(Call.status.in_(filters.status))
+        if filters.created_after:
+            where.append(Call.created_at >= filters.created_after)
+        if filters.created_before:
+            where.append(Call.created_at < filters.created_before)
+        if filters.mobile_number:
+            # Stored the way customer set uploads normalize them
+            mobile_number = normalize_mobile_number(filters.mobile_number) or filters.mobile_number
+            where.append(Call.to_number == mobile_number)
+        if filters.transcript:
+            where.append(
+                func.to_tsvector(TRANSCRIPT_SEARCH_REGCONFIG, Call.transcript).op("@@")(
+                    func.websearch_to_tsquery(TRANSCRIPT_SEARCH_REGCONFIG, filters.transcript)
+                )
+            )
+        return where
+
+    async def search(
+        self,
+        organization_id: str,
+        filters: CallSearchFilters,
+        limit: int,
+        cursor: Optional[Cursor] = None,
+        count_strategy: Optional[CountStrategy] = None,
+        projection: Optional[Type[BaseSchema]] = None,
+    ) -> Page[CallDBSchema]:
+        return await self.list_with_pagination(
+            limit=limit,
+            cursor=cursor,
+            where=self.search_conditions(organization_id, filters),
+            count_strategy=count_strategy,
+            projection=projection,
+        )
+
+    def search_query(
+        self,
+        organization_id: str,
+        filters: CallSearchFilters,
+        limit: int,
+        cursor: Optional[Cursor] = None,
+        projection: Optional[Type[BaseSchema]] = None,
+    ) -> Select:
+        """The page query `search` runs, e.g. to explain it"""
+        return self.page_query(
+            limit,
+            cursor=cursor,
+            where=self.search_conditions(organization_id, filters),
+            projection=projection,
+        )
@@ -0,0 +1,22 @@
+from typing import Type
+
+from models import CallConfig
+from schemas import CallConfigDBInputSchema, CallConfigDBSchema
+
+from .base import BaseRepository
+
+
+class CallConfigRepository(
+    BaseRepository[CallConfigDBInputSchema, CallConfigDBSchema, CallConfig]
+):
+    @property
+    def _in_schema(self) -> Type[CallConfigDBInputSchema]:
+        return CallConfigDBInputSchema
+
+    @property
+    def _schema(self) -> Type[CallConfigDBSchema]:
+        return CallConfigDBSchema
+
+    @property
+    def _table(self) -> Type[CallConfig]:
+        return CallConfig
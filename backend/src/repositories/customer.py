@@ -1,10 +1,27 @@
 from typing import Type
 
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.exc import IntegrityError
+
+from exceptions import DatabaseException, RecordIntegrityException
 from models import Customer
 from schemas import CustomerDBInputSchema, CustomerDBSchema
 
 from .base import BaseRepository
 
+CUSTOMER_STAGING_TABLE = "customer_staging"
+CUSTOMER_STAGING_COLUMNS = [
+    "organization_id",
+    "customer_set_id",
+    "name",
+    "mobile_number",
+    "customer_metadata",
+    "created_by",
+    "updated_by",
+]
+
 
 class CustomerRepository(BaseRepository[CustomerDBInputSchema, CustomerDBSchema, Customer]):
     @property
@@ -19,3 +36,49 @@ class CustomerRepository(BaseRepository[CustomerDBInputSchema, CustomerDBSchema,
     def _table(self) -> Type[Customer]:
         return Customer
 
+    async def copy_upsert(self, records: list[tuple]) -> int:
+        """COPY `records` into a transaction-scoped staging table and upsert them on
+        `customer_set_id_mobile_number_uc`. An existing customer takes the new name and
+        has its metadata merged with the new metadata.
+
+        Records hold the values of CUSTOMER_STAGING_COLUMNS in order, with the metadata
+        as JSON text, and must not contain the same mobile number twice for a customer
+        set. Building them directly avoids a schema object per row on large imports."""
+        try:
+            await self._db_session.execute(
+                text(
+                    f"CREATE TEMPORARY TABLE {CUSTOMER_STAGING_TABLE} "
+                    "(organization_id text, customer_set_id text, name text, mobile_number text, "
+                    "customer_metadata jsonb, created_by text, updated_by text) ON COMMIT DROP"
+                )
+            )
+
+            connection = await self._db_session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                CUSTOMER_STAGING_TABLE, columns=CUSTOMER_STAGING_COLUMNS, records=records
+            )
+
+            staging = table(CUSTOMER_STAGING_TABLE, *[column(name) for name in CUSTOMER_STAGING_COLUMNS])
+            q = insert(self._table).from_select(
+                CUSTOMER_STAGING_COLUMNS,
+                select(*[staging.c[name] for name in CUSTOMER_STAGING_COLUMNS]),
+            )
+            q = q.on_conflict_do_update(
+                constraint="customer_set_id_mobile_number_uc",
+                set_={
+                    "name": q.excluded.name,
+                    "customer_metadata": self._table.customer_metadata.op("||")(
+                        q.excluded.customer_metadata
+                    ),
+                    "updated_by": q.excluded.updated_by,
+                    "updated_at": func.current_timestamp_utc(),
+                },
+            )
+            cursor_result: CursorResult = await self._db_session.execute(q)
+            await self._db_session.commit()
+            return cursor_result.rowcount
+        except IntegrityError as e:
+            raise RecordIntegrityException(e)
+        except Exception as e:
+            raise DatabaseException(e)
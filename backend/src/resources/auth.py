@@ -3,7 +3,7 @@ from gotrue.errors import AuthApiError
 from sqlalchemy.ext.asyncio import AsyncSession
 from supabase._async.client import AsyncClient as SupabaseClient
 
-from auth import get_current_admin_user, get_supabase
+from auth import get_current_admin_user, get_supabase, get_supabase_session_client
 from exceptions import (
     ApplicationException,
     BadRequestException,
@@ -73,7 +73,7 @@ async def create_user(
 async def login_user(
     payload: LoginRequest,
     db: AsyncSession = Depends(get_db),
-    supabase: SupabaseClient = Depends(get_supabase),
+    supabase: SupabaseClient = Depends(get_supabase_session_client),
 ):
     try:
         log.info(f"Logging in user with email: '{payload.email}'")
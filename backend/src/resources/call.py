@@ -1,9 +1,11 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import get_current_user
+from constants import CallStatus, CountStrategy
 from exceptions import (
     ApplicationException,
     InternalServerException,
@@ -11,33 +13,56 @@ from exceptions import (
     RecordNotFoundException,
 )
 from log import log
-from models import Call, get_db
+from models import get_db
 from repositories import CallRepository
 from schemas import (
     CallActionSchema,
     CallResponse,
+    CallSearchFilters,
     CallTranscriptResponse,
     ListCallsResponse,
 )
+from util.pagination import Cursor, set_pagination_headers
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[ListCallsResponse])
 async def list_calls(
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    count: Optional[CountStrategy] = Query(None),
+    campaign_id: Optional[str] = Query(None),
+    status: Optional[List[CallStatus]] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    mobile_number: Optional[str] = Query(None),
+    transcript: Optional[str] = Query(None, min_length=2),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
     try:
         log.info("Listing calls")
-        q = {"organization_id": current_user_organization_id}
-        items = await CallRepository(db).list(
-            **q, order_by=[Call.created_at.desc()], limit=limit, offset=offset
+        filters = CallSearchFilters(
+            campaign_id=campaign_id,
+            status=status,
+            created_after=created_after,
+            created_before=created_before,
+            mobile_number=mobile_number,
+            transcript=transcript,
         )
-        return [ListCallsResponse(**item.dict()) for item in items]
+        page = await CallRepository(db).search(
+            current_user_organization_id,
+            filters,
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            count_strategy=count,
+            projection=ListCallsResponse,
+        )
+        set_pagination_headers(response, page)
+        return page.entries
     except ApplicationException as e:
         raise e
     except Exception as e:
@@ -53,8 +78,8 @@ async def get_call(
     current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
     try:
         log.info(f"Getting call_id: '{call_id}'")
-        item = await CallRepository(db).get(
-            id=call_id, organization_id=current_user_organization_id
+        item = await CallRepository(db).get_by_id(
+            call_id, organization_id=current_user_organization_id
         )
         return CallResponse(**item.dict())
     except RecordNotFoundException as e:
@@ -74,8 +99,8 @@ async def get_call_transcript(
     current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
     try:
         log.info(f"Getting transcript for call_id: '{call_id}'")
-        item = await CallRepository(db).get(
-            id=call_id, organization_id=current_user_organization_id
+        item = await CallRepository(db).get_by_id(
+            call_id, organization_id=current_user_organization_id
         )
         return CallTranscriptResponse(transcript=item.transcript)
     except RecordNotFoundException as e:
@@ -94,8 +119,8 @@ async def get_call_actions(
     current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
     try:
         log.info(f"Getting actions for call_id: '{call_id}'")
-        item = await CallRepository(db).get(
-            id=call_id, organization_id=current_user_organization_id
+        item = await CallRepository(db).get_by_id(
+            call_id, organization_id=current_user_organization_id
         )
         actions = []
         if item.actions:
@@ -1,10 +1,10 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import get_current_user
-from constants import CallStatus, CampaignAction, CampaignStatus
+from constants import CallStatus, CampaignAction, CampaignStatus, CountStrategy
 from exceptions import (
     ApplicationException,
     BadRequestException,
@@ -33,6 +33,7 @@ from schemas import (
     ExecuteCampaignResponse,
     UpdateCampaignRequest,
 )
+from util.pagination import Cursor, set_pagination_headers
 
 router = APIRouter()
 
@@ -90,14 +91,24 @@ async def create_campaign(
 
 @router.get("", response_model=List[CampaignResponse])
 async def list_campaigns(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    count: Optional[CountStrategy] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
     try:
         log.info("Listing campaigns")
-        items = await CampaignRepository(db).list(organization_id=current_user_organization_id)
-        return [CampaignResponse(**item.dict()) for item in items]
+        page = await CampaignRepository(db).list_with_pagination(
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            count_strategy=count,
+            organization_id=current_user_organization_id,
+        )
+        set_pagination_headers(response, page)
+        return [CampaignResponse(**item.dict()) for item in page.entries]
     except ApplicationException as e:
         raise e
     except Exception as e:
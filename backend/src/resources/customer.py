@@ -1,9 +1,10 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import get_current_user
+from constants import CountStrategy
 from exceptions import (
     ApplicationException,
     BadRequestException,
@@ -21,6 +22,7 @@ from schemas import (
     CustomerResponse,
     UpdateCustomerRequest,
 )
+from util.pagination import Cursor, set_pagination_headers
 
 router = APIRouter()
 
@@ -64,7 +66,11 @@ async def create_customer(
 
 @router.get("", response_model=List[CustomerResponse])
 async def list_customers(
+    response: Response,
     customer_set_id: str = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    count: Optional[CountStrategy] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
@@ -74,8 +80,15 @@ async def list_customers(
         q = {"organization_id": current_user_organization_id}
         if customer_set_id:
             q["customer_set_id"] = customer_set_id
-        items = await CustomerRepository(db).list(**q)
-        return [CustomerResponse(**item.dict()) for item in items]
+        page = await CustomerRepository(db).list_with_pagination(
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            count_strategy=count,
+            projection=CustomerResponse,
+            **q,
+        )
+        set_pagination_headers(response, page)
+        return page.entries
     except ApplicationException as e:
         raise e
     except Exception as e:
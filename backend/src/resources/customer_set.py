@@ -1,13 +1,14 @@
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+from fastapi import APIRouter, Depends, File, Form, Query, Response, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
+from storage3.utils import StorageException
 from supabase._async.client import AsyncClient as SupabaseClient
 
 from auth import get_current_user, get_supabase
-from config import SUPABASE_CUSTOMER_SET_BUCKET_NAME
-from constants import CustomerSetStatus, CustomerSetType
+from config import SIGNED_URL_EXPIRY, SUPABASE_CUSTOMER_SET_BUCKET_NAME
+from constants import CountStrategy, CustomerSetStatus, CustomerSetType
 from exceptions import (
     ApplicationException,
     BadRequestException,
@@ -15,21 +16,24 @@ from exceptions import (
     NotFoundException,
     RecordNotFoundException,
 )
-from jobs import process_csv_file_task
+from jobs import delete_customer_set_task, process_csv_file_task
 from log import log
-from models import get_db
+from models import CustomerSet, get_db
 from repositories import (
     CampaignCustomerSetRepository,
-    CustomerRepository,
     CustomerSetRepository,
     OrganizationRepository,
 )
 from schemas import (
     CustomerSetDBInputSchema,
+    CustomerSetErrorFileResponse,
     CustomerSetResponse,
+    CustomerSetUploadUrlResponse,
     ProcessCustomerSetResponse,
     UpdateCustomerSetRequest,
 )
+from util.pagination import Cursor, set_pagination_headers
+from util.supabase_client import read_chunks, upload_stream
 
 router = APIRouter()
 
@@ -40,10 +44,9 @@ async def create_customer_set(
     name: str = Form(...),
     description: Optional[str] = Form(None),
     type: CustomerSetType = Form(...),
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-    supabase: SupabaseClient = Depends(get_supabase),
 ):
     current_user_id = current_user.get("sub")
     current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
@@ -73,16 +76,19 @@ async def create_customer_set(
 
         customer_set = await CustomerSetRepository(db).create(data)
 
-        if file.size > 0:
+        # Without a file, the browser uploads it directly through /upload-url
+        if file and file.size > 0:
             if file.content_type != "text/csv":
                 raise BadRequestException(detail="Only CSV files are allowed")
 
             file_extension = file.filename.split(".")[-1]
             path = f"{customer_set.id}.{file_extension}"
-            response = await supabase.storage.from_(SUPABASE_CUSTOMER_SET_BUCKET_NAME).upload(
-                file=file.file.read(),
-                path=path,
-                file_options={"content-type": file.content_type},
+            response = await upload_stream(
+                SUPABASE_CUSTOMER_SET_BUCKET_NAME,
+                path,
+                read_chunks(file),
+                content_type=file.content_type,
+                content_length=file.size,
             )
             log.debug(response.json())
 
@@ -100,16 +106,99 @@ async def create_customer_set(
         raise InternalServerException(e)
 
 
+@router.post("/{customer_set_id}/upload-url", response_model=CustomerSetUploadUrlResponse)
+async def create_customer_set_upload_url(
+    customer_set_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    supabase: SupabaseClient = Depends(get_supabase),
+):
+    """Signed URL the browser uploads the CSV to directly, followed by /upload-complete"""
+    current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
+    try:
+        log.info(f"Creating upload url for customer_set_id: '{customer_set_id}'")
+        item = await CustomerSetRepository(db).get(
+            id=customer_set_id, organization_id=current_user_organization_id
+        )
+        if item.status != CustomerSetStatus.UPLOADED.value:
+            raise BadRequestException(detail="Customer set is already being processed")
+
+        response = await supabase.storage.from_(
+            SUPABASE_CUSTOMER_SET_BUCKET_NAME
+        ).create_signed_upload_url(f"{item.id}.csv")
+        return CustomerSetUploadUrlResponse(
+            url=response["signed_url"], token=response["token"], path=response["path"]
+        )
+    except RecordNotFoundException as e:
+        raise NotFoundException(e)
+    except ApplicationException as e:
+        raise e
+    except Exception as e:
+        raise InternalServerException(e)
+
+
+@router.post("/{customer_set_id}/upload-complete", response_model=CustomerSetResponse)
+async def complete_customer_set_upload(
+    customer_set_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    supabase: SupabaseClient = Depends(get_supabase),
+):
+    current_user_id = current_user.get("sub")
+    current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
+    try:
+        log.info(f"Completing upload for customer_set_id: '{customer_set_id}'")
+        item = await CustomerSetRepository(db).get(
+            id=customer_set_id, organization_id=current_user_organization_id
+        )
+        if item.status != CustomerSetStatus.UPLOADED.value:
+            raise BadRequestException(detail="Customer set is already being processed")
+
+        path = f"{item.id}.csv"
+        try:
+            # Fails when nothing was uploaded to the path
+            await supabase.storage.from_(SUPABASE_CUSTOMER_SET_BUCKET_NAME).create_signed_url(
+                path, SIGNED_URL_EXPIRY
+            )
+        except StorageException as e:
+            raise BadRequestException(e, detail="File has not been uploaded")
+
+        await CustomerSetRepository(db).update(
+            values={"url": path, "updated_by": current_user_id}, id=item.id
+        )
+        customer_set = await CustomerSetRepository(db).get(id=item.id)
+
+        process_csv_file_task.apply_async((customer_set.id,))
+        return CustomerSetResponse(**customer_set.dict())
+    except RecordNotFoundException as e:
+        raise NotFoundException(e)
+    except ApplicationException as e:
+        raise e
+    except Exception as e:
+        raise InternalServerException(e)
+
+
 @router.get("", response_model=List[CustomerSetResponse])
 async def list_customer_sets(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    count: Optional[CountStrategy] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
     try:
         log.info("Listing customer_sets")
-        items = await CustomerSetRepository(db).list(organization_id=current_user_organization_id)
-        return [CustomerSetResponse(**item.dict()) for item in items]
+        page = await CustomerSetRepository(db).list_with_pagination(
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            count_strategy=count,
+            projection=CustomerSetResponse,
+            organization_id=current_user_organization_id,
+        )
+        set_pagination_headers(response, page)
+        return page.entries
     except ApplicationException as e:
         raise e
     except Exception as e:
@@ -151,6 +240,8 @@ async def process_customer_set(
         )
         if item.status == CustomerSetStatus.PROCESSED.value:
             raise BadRequestException(detail="Customer set has already been processed")
+        if item.status == CustomerSetStatus.DELETING.value:
+            raise BadRequestException(detail="Customer set is being deleted")
 
         process_csv_file_task.apply_async((customer_set_id,))
         return ProcessCustomerSetResponse(message="Processing queued successfully")
@@ -162,6 +253,33 @@ async def process_customer_set(
         raise InternalServerException(e)
 
 
+@router.get("/{customer_set_id}/errors", response_model=CustomerSetErrorFileResponse)
+async def get_customer_set_error_file(
+    customer_set_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    supabase: SupabaseClient = Depends(get_supabase),
+):
+    current_user_organization_id = current_user.get("user_metadata", {}).get("organization_id")
+    try:
+        log.info(f"Getting error file for customer_set_id: '{customer_set_id}'")
+        item = await CustomerSetRepository(db).get(
+            id=customer_set_id, organization_id=current_user_organization_id
+        )
+        if not item.error_url:
+            raise NotFoundException("Customer set has no error file")
+
+        bucket = supabase.storage.from_(SUPABASE_CUSTOMER_SET_BUCKET_NAME)
+        response = await bucket.create_signed_url(item.error_url, SIGNED_URL_EXPIRY)
+        return CustomerSetErrorFileResponse(url=response["signedURL"])
+    except RecordNotFoundException as e:
+        raise NotFoundException(e)
+    except ApplicationException as e:
+        raise e
+    except Exception as e:
+        raise InternalServerException(e)
+
+
 @router.patch("/{customer_set_id}", response_model=CustomerSetResponse)
 async def update_customer_set(
     customer_set_id: str,
@@ -188,7 +306,7 @@ async def update_customer_set(
         raise InternalServerException(e)
 
 
-@router.delete("/{customer_set_id}", status_code=204)
+@router.delete("/{customer_set_id}", response_model=ProcessCustomerSetResponse, status_code=202)
 async def delete_customer_set(
     customer_set_id: str,
     current_user: dict = Depends(get_current_user),
@@ -201,32 +319,33 @@ async def delete_customer_set(
         customer_set = await CustomerSetRepository(db).get(
             id=customer_set_id, organization_id=current_user_organization_id
         )
+        # Claimed in one UPDATE, so a set cannot start processing or be deleted twice in
+        # between: rows still being loaded would be inserted after the deletion
+        if not await CustomerSetRepository(db).update_returning(
+            {"status": CustomerSetStatus.DELETING.value, "updated_by": current_user_id},
+            returning=CustomerSet.id,
+            where=[
+                CustomerSet.id == customer_set_id,
+                CustomerSet.status.notin_(
+                    [CustomerSetStatus.PROCESSING.value, CustomerSetStatus.DELETING.value]
+                ),
+            ],
+        ):
+            raise BadRequestException(detail="Customer set is being processed or deleted")
         log.info(f"Deleting files for customer_set_id: '{customer_set_id}'")
         response = await supabase.storage.from_(SUPABASE_CUSTOMER_SET_BUCKET_NAME).remove(
-            customer_set.url
+            [path for path in [customer_set.url, customer_set.error_url] if path]
         )
         log.debug(response)
         log.info(
             f"Deleting campaign-customer-set mapping for customer_set_id: '{customer_set_id}'"
         )
-        try:
-            await CampaignCustomerSetRepository(db).delete(
-                customer_set_id=customer_set_id, permanent_operation=True
-            )
-            log.info(f"Deleting customers for customer_set_id: '{customer_set_id}'")
-            await CustomerRepository(db).delete(
-                _user_id=current_user_id,
-                customer_set_id=customer_set_id,
-                organization_id=current_user_organization_id,
-            )
-        except RecordNotFoundException:
-            pass
-        log.info(f"Deleting customer_set_id: '{customer_set_id}'")
-        await CustomerSetRepository(db).delete(
-            _user_id=current_user_id,
-            id=customer_set_id,
-            organization_id=current_user_organization_id,
+        await CampaignCustomerSetRepository(db).delete(
+            customer_set_id=customer_set_id, permanent_operation=True
         )
+        log.info(f"Queuing deletion of customer_set_id: '{customer_set_id}'")
+        delete_customer_set_task.apply_async((customer_set_id, current_user_id))
+        return ProcessCustomerSetResponse(message="Deletion queued successfully")
     except RecordNotFoundException as e:
         raise NotFoundException(e)
     except ApplicationException as e:
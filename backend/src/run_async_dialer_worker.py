@@ -0,0 +1,15 @@
+from jobs.call import run_running_campaign_dialers
+from util.asyncio import async_to_sync
+from util.worker import setup_worker_process, teardown_worker_process
+
+
+def run_async_dialer_worker():
+    setup_worker_process()
+    try:
+        async_to_sync(run_running_campaign_dialers)
+    finally:
+        teardown_worker_process()
+
+
+if __name__ == "__main__":
+    run_async_dialer_worker()
@@ -6,6 +6,7 @@ from .agent import *
 from .campaign import *
 from .campaign_customer_set import *
 from .call import *
+from .call_config import *
 from .customer import *
 from .customer_set import *
 from .organization import *
@@ -4,7 +4,7 @@ from typing import Optional
 
 from vocode.streaming.models.agent import InterruptSensitivity
 
-from constants import DEFAULT_INITIAL_MESSAGE, DEFAULT_PROMPT, DEFAULT_VOICE
+from constants import DEFAULT_INITIAL_MESSAGE, DEFAULT_PROMPT, DEFAULT_VOICE, CallStatus
 
 from .base import BaseSchema
 
@@ -24,14 +24,11 @@ class CallDBInputSchema(BaseSchema):
     recording_url: Optional[str] = None
     transcript: Optional[str] = None
     actions: Optional[dict | list] = None
+    call_config_id: str
     telephony_service_id: str
-    telephony_service_config: dict
     transcriber_id: str
-    transcriber_config: dict
     agent_id: str
-    agent_config: dict
     synthesizer_id: str
-    synthesizer_config: dict
     created_by: str
     updated_by: str
 
@@ -60,6 +57,15 @@ class ListCallsResponse(BaseSchema):
     duration: Optional[int]
 
 
+class CallSearchFilters(BaseSchema):
+    campaign_id: Optional[str] = None
+    status: Optional[list[CallStatus]] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    mobile_number: Optional[str] = None
+    transcript: Optional[str] = None
+
+
 class CallResponse(BaseSchema):
     id: str
     organization_id: str
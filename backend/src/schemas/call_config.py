@@ -0,0 +1,16 @@
+from .base import BaseSchema
+
+
+class CallConfigDBInputSchema(BaseSchema):
+    id: str
+    version: int
+    telephony_service_config: dict
+    transcriber_config: dict
+    agent_config: dict
+    synthesizer_config: dict
+    created_by: str
+    updated_by: str
+
+
+class CallConfigDBSchema(CallConfigDBInputSchema):
+    pass
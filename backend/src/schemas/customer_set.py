@@ -12,6 +12,10 @@ class CustomerSetDBInputSchema(BaseSchema):
     type: CustomerSetType
     status: CustomerSetStatus
     url: Optional[str] = None
+    total_count: Optional[int] = None
+    processed_count: int = 0
+    failed_count: int = 0
+    error_url: Optional[str] = None
     created_by: str
     updated_by: str
 
@@ -31,6 +35,9 @@ class CreateCustomerSetRequest(BaseSchema):
 class CustomerSetResponse(CreateCustomerSetRequest):
     id: str
     status: CustomerSetStatus
+    total_count: Optional[int] = None
+    processed_count: int = 0
+    failed_count: int = 0
 
 
 class UpdateCustomerSetRequest(BaseSchema):
@@ -40,3 +47,13 @@ class UpdateCustomerSetRequest(BaseSchema):
 
 class ProcessCustomerSetResponse(BaseSchema):
     message: str
+
+
+class CustomerSetErrorFileResponse(BaseSchema):
+    url: str
+
+
+class CustomerSetUploadUrlResponse(BaseSchema):
+    url: str
+    token: str
+    path: str
@@ -31,7 +31,9 @@ from resources import (
 )
 from streaming.telephony.server.base import ExotelInboundCallConfig
 from util.config_manager import CONFIG_MANAGER
+from util.pagination import PAGINATION_HEADERS
 from util.security_headers import add_security_headers
+from util.supabase_client import close_supabase_client, get_supabase_client
 from util.telephony_server import EXOTEL_CONFIG
 
 log.warning(" ██████╗ ██╗     ██╗██╗   ██╗███████╗")
@@ -59,12 +61,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["OPTIONS", "GET", "POST", "PATCH", "PUT", "DELETE"],
     allow_headers=["Content-Type", "Authorization", "Accept", "Referer", "User-Agent"],
+    expose_headers=PAGINATION_HEADERS,
 )
 app.add_middleware(CorrelationIdMiddleware)
 add_security_headers(app)
 add_exception_handlers(app)
 
 
+@app.on_event("startup")
+async def startup():
+    get_supabase_client()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_supabase_client()
+
+
 sentry_sdk.init(
     dsn=config.SENTRY_DSN,
     environment=config.ENVIRONMENT,
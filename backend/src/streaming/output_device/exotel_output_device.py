@@ -1,10 +1,8 @@
 from __future__ import annotations
 
 import asyncio
-import audioop
-import base64
-import json
-from typing import Optional, Union
+import time
+from typing import List, Optional, Union
 
 from fastapi import WebSocket
 from fastapi.websockets import WebSocketState
@@ -16,7 +14,19 @@ from vocode.streaming.telephony.constants import DEFAULT_SAMPLING_RATE
 from vocode.streaming.utils.create_task import asyncio_create_task_with_done_error_log
 from vocode.streaming.utils.worker import InterruptibleEvent
 
-from streaming.telephony.constants import EXOTEL_AUDIO_ENCODING
+from streaming.telephony.constants import (
+    EXOTEL_AUDIO_ENCODING,
+    EXOTEL_OUTPUT_FRAME_MS,
+    EXOTEL_OUTPUT_MAX_LEAD_MS,
+    SAMPLE_WIDTHS,
+)
+from streaming.telephony.exotel_messages import ExotelMessageEncoder
+from streaming.telephony.pacing import FramePacer
+from streaming.utils.transcoding import (
+    SUPPORTED_SAMPLING_RATES,
+    Resampler,
+    ulaw_to_linear16,
+)
 
 
 class ChunkFinishedMarkMessage(BaseModel):
@@ -32,41 +42,116 @@ class ExotelOutputDevice(AbstractOutputDevice):
         ws: Optional[WebSocket] = None,
         stream_sid: Optional[str] = None,
         convert_to_linear16: bool = False,
+        input_sampling_rate: Optional[int] = None,
+        frame_ms: int = EXOTEL_OUTPUT_FRAME_MS,
+        max_lead_ms: int = EXOTEL_OUTPUT_MAX_LEAD_MS,
     ):
         super().__init__(sampling_rate=DEFAULT_SAMPLING_RATE, audio_encoding=EXOTEL_AUDIO_ENCODING)
         self.ws = ws
         self.stream_sid = stream_sid
         self.convert_to_linear16 = convert_to_linear16
         self.active = True
+        # Synthesizers that don't produce audio at Exotel's rate are resampled here
+        self._resampler: Optional[Resampler] = None
+        if input_sampling_rate and input_sampling_rate != DEFAULT_SAMPLING_RATE.value:
+            if input_sampling_rate in SUPPORTED_SAMPLING_RATES:
+                self._resampler = Resampler(input_sampling_rate, DEFAULT_SAMPLING_RATE.value)
+            else:
+                logger.warning(f"Cannot resample synthesizer audio at {input_sampling_rate}Hz")
+
+        sample_width = SAMPLE_WIDTHS[EXOTEL_AUDIO_ENCODING]
+        self.pacer: FramePacer[InterruptibleEvent[AudioChunk]] = FramePacer(
+            bytes_per_second=DEFAULT_SAMPLING_RATE.value * sample_width,
+            frame_ms=frame_ms,
+            max_lead_ms=max_lead_ms,
+            sample_width=sample_width,
+        )
+        self._interrupted_at: Optional[float] = None
 
+        self._audio_chunks_queue: asyncio.Queue[InterruptibleEvent[AudioChunk]] = asyncio.Queue()
         self._exotel_events_queue: asyncio.Queue[str] = asyncio.Queue()
         self._mark_message_queue: asyncio.Queue[MarkMessage] = asyncio.Queue()
         self._unprocessed_audio_chunks_queue: asyncio.Queue[InterruptibleEvent[AudioChunk]] = (
             asyncio.Queue()
         )
 
+    @property
+    def stream_sid(self) -> Optional[str]:
+        return self._stream_sid
+
+    @stream_sid.setter
+    def stream_sid(self, stream_sid: Optional[str]):
+        # Set once Exotel's start message arrives, the encoder bakes it into its templates
+        self._stream_sid = stream_sid
+        self._encoder = ExotelMessageEncoder(stream_sid)
+
     def consume_nonblocking(self, item: InterruptibleEvent[AudioChunk]):
         if self.convert_to_linear16:
             item.payload.data = self._convert_chunk_to_linear16(item.payload.data)
+        if self._resampler is not None:
+            item.payload.data = self._resampler.process(item.payload.data)
 
         if not item.is_interrupted():
-            self._send_audio_chunk_and_mark(
-                chunk=item.payload.data, chunk_id=str(item.payload.chunk_id)
-            )
-            self._unprocessed_audio_chunks_queue.put_nowait(item)
+            self._audio_chunks_queue.put_nowait(item)
         else:
-            audio_chunk = item.payload
-            audio_chunk.on_interrupt()
-            audio_chunk.state = ChunkState.INTERRUPTED
+            self._interrupt_chunk(item)
 
     def interrupt(self):
+        # Audio not sent yet is dropped here, so nothing more is sent after the clear
+        self._interrupted_at = time.monotonic()
+        for item in self.pacer.clear(self._interrupted_at):
+            self._interrupt_chunk(item)
+        while not self._audio_chunks_queue.empty():
+            self._interrupt_chunk(self._audio_chunks_queue.get_nowait())
         self._send_clear_message()
 
     def enqueue_mark_message(self, mark_message: MarkMessage):
         self._mark_message_queue.put_nowait(mark_message)
 
     def _convert_chunk_to_linear16(self, chunk: bytes) -> bytes:
-        return audioop.ulaw2lin(chunk, 2)
+        return ulaw_to_linear16(chunk)
+
+    def _interrupt_chunk(self, item: InterruptibleEvent[AudioChunk]):
+        item.payload.on_interrupt()
+        item.payload.state = ChunkState.INTERRUPTED
+
+    async def _next_audio_chunk(
+        self, timeout: Optional[float]
+    ) -> Optional[InterruptibleEvent[AudioChunk]]:
+        if not self._audio_chunks_queue.empty():
+            return self._audio_chunks_queue.get_nowait()
+        if timeout is not None and timeout <= 0:
+            return None
+        try:
+            return await asyncio.wait_for(self._audio_chunks_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _send_audio_frames(self):
+        while True:
+            try:
+                if not self.pacer.has_frame():
+                    # Top up the next frame, sending a short one only once the audio
+                    # already sent is within a frame of running out
+                    timeout = None
+                    if len(self.pacer):
+                        timeout = self.pacer.lead(time.monotonic()) - self.pacer.frame_duration
+                    item = await self._next_audio_chunk(timeout)
+                    if item is not None:
+                        if item.is_interrupted():
+                            self._interrupt_chunk(item)
+                        else:
+                            self.pacer.add(item.payload.data, item)
+                        continue
+                delay = self.pacer.delay(time.monotonic())
+                if delay:
+                    await asyncio.sleep(delay)
+                    # The frame may have been dropped by an interrupt while waiting
+                    continue
+            except asyncio.CancelledError:
+                return
+            frame, finished = self.pacer.next_frame(time.monotonic())
+            self._send_audio_frame_and_mark(frame, finished)
 
     async def _send_exotel_messages(self):
         while True:
@@ -77,64 +162,69 @@ class ExotelOutputDevice(AbstractOutputDevice):
             if self.ws.application_state == WebSocketState.DISCONNECTED:
                 break
             await self.ws.send_text(exotel_event)
+            if exotel_event == self._encoder.clear() and self._interrupted_at is not None:
+                self.pacer.stats.record_interrupt(time.monotonic() - self._interrupted_at)
+                self._interrupted_at = None
 
     async def _process_mark_messages(self):
         while True:
             try:
                 # mark messages are tagged with the chunk ID that is attached to the audio chunk
                 # but they are guaranteed to come in the same order as the audio chunks, and we
-                # don't need to build resiliency there
+                # don't need to build resiliency there. A mark is sent once per frame, with the
+                # ID of the last chunk that finished in it, and stands for every chunk up to it
                 mark_message = await self._mark_message_queue.get()
                 item = await self._unprocessed_audio_chunks_queue.get()
             except asyncio.CancelledError:
                 return
 
-            self.interruptible_event = item
-            audio_chunk = item.payload
+            while (
+                mark_message.chunk_id != str(item.payload.chunk_id)
+                and not self._unprocessed_audio_chunks_queue.empty()
+            ):
+                self._finish_chunk(item)
+                item = self._unprocessed_audio_chunks_queue.get_nowait()
 
-            if mark_message.chunk_id != str(audio_chunk.chunk_id):
+            if mark_message.chunk_id != str(item.payload.chunk_id):
                 logger.error(
                     f"Received a mark message out of order with chunk ID {mark_message.chunk_id}"
                 )
+            self._finish_chunk(item)
 
-            if item.is_interrupted():
-                audio_chunk.on_interrupt()
-                audio_chunk.state = ChunkState.INTERRUPTED
-                continue
+    def _finish_chunk(self, item: InterruptibleEvent[AudioChunk]):
+        self.interruptible_event = item
+        if item.is_interrupted():
+            self._interrupt_chunk(item)
+            return
 
-            audio_chunk.on_play()
-            audio_chunk.state = ChunkState.PLAYED
+        item.payload.on_play()
+        item.payload.state = ChunkState.PLAYED
 
-            self.interruptible_event.is_interruptible = False
+        self.interruptible_event.is_interruptible = False
 
     async def _run_loop(self):
+        send_audio_frames_task = asyncio_create_task_with_done_error_log(self._send_audio_frames())
         send_exotel_messages_task = asyncio_create_task_with_done_error_log(
             self._send_exotel_messages()
         )
         process_mark_messages_task = asyncio_create_task_with_done_error_log(
             self._process_mark_messages()
         )
-        await asyncio.gather(send_exotel_messages_task, process_mark_messages_task)
-
-    def _send_audio_chunk_and_mark(self, chunk: bytes, chunk_id: str):
-        media_message = {
-            "event": "media",
-            "stream_sid": self.stream_sid,
-            "media": {"payload": base64.b64encode(chunk).decode("utf-8")},
-        }
-        self._exotel_events_queue.put_nowait(json.dumps(media_message))
-        mark_message = {
-            "event": "mark",
-            "stream_sid": self.stream_sid,
-            "mark": {
-                "name": chunk_id,
-            },
-        }
-        self._exotel_events_queue.put_nowait(json.dumps(mark_message))
+        await asyncio.gather(
+            send_audio_frames_task, send_exotel_messages_task, process_mark_messages_task
+        )
+
+    def _send_audio_frame_and_mark(
+        self, frame: bytes, finished: List[InterruptibleEvent[AudioChunk]]
+    ):
+        if frame:
+            self._exotel_events_queue.put_nowait(self._encoder.media(frame))
+        if finished:
+            for item in finished:
+                self._unprocessed_audio_chunks_queue.put_nowait(item)
+            self._exotel_events_queue.put_nowait(
+                self._encoder.mark(str(finished[-1].payload.chunk_id))
+            )
 
     def _send_clear_message(self):
-        clear_message = {
-            "event": "clear",
-            "stream_sid": self.stream_sid,
-        }
-        self._exotel_events_queue.put_nowait(json.dumps(clear_message))
+        self._exotel_events_queue.put_nowait(self._encoder.clear())
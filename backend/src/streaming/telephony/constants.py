@@ -5,3 +5,18 @@ from vocode.streaming.telephony.constants import DEFAULT_SAMPLING_RATE
 EXOTEL_CHUNK_SIZE = DEFAULT_SAMPLING_RATE.value // 10
 EXOTEL_AUDIO_ENCODING = AudioEncoding.LINEAR16
 
+
+# Width and value of one sample of silence, by audio encoding
+SAMPLE_WIDTHS = {AudioEncoding.LINEAR16: 2, AudioEncoding.MULAW: 1}
+SILENCE_SAMPLES = {AudioEncoding.LINEAR16: b"\x00\x00", AudioEncoding.MULAW: b"\xff"}
+
+# Inbound audio is passed to the transcriber in frames of EXOTEL_JITTER_BUFFER_FRAME_MS,
+# waiting up to EXOTEL_JITTER_BUFFER_DEPTH_MS for late audio before concealing a gap
+EXOTEL_JITTER_BUFFER_FRAME_MS = 20
+EXOTEL_JITTER_BUFFER_DEPTH_MS = 60
+EXOTEL_JITTER_BUFFER_MAX_GAP_MS = 1000
+
+# Outbound audio is sent in frames of EXOTEL_OUTPUT_FRAME_MS, at most
+# EXOTEL_OUTPUT_MAX_LEAD_MS ahead of playback, so an interrupt drops the rest unsent
+EXOTEL_OUTPUT_FRAME_MS = 100
+EXOTEL_OUTPUT_MAX_LEAD_MS = 200
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import base64
 import json
 import os
 from enum import Enum
@@ -19,6 +18,7 @@ from vocode.streaming.synthesizer.abstract_factory import AbstractSynthesizerFac
 from vocode.streaming.telephony.config_manager.base_config_manager import (
     BaseConfigManager,
 )
+from vocode.streaming.telephony.constants import DEFAULT_SAMPLING_RATE
 from vocode.streaming.telephony.conversation.abstract_phone_conversation import (
     AbstractPhoneConversation,
 )
@@ -31,6 +31,16 @@ from streaming.output_device.exotel_output_device import (
     ExotelOutputDevice,
 )
 from streaming.telephony.client.exotel_client import ExotelClient
+from streaming.telephony.constants import (
+    EXOTEL_AUDIO_ENCODING,
+    EXOTEL_JITTER_BUFFER_DEPTH_MS,
+    EXOTEL_JITTER_BUFFER_FRAME_MS,
+    EXOTEL_JITTER_BUFFER_MAX_GAP_MS,
+    SAMPLE_WIDTHS,
+    SILENCE_SAMPLES,
+)
+from streaming.telephony.exotel_messages import ExotelMediaFrame, decode_exotel_message
+from streaming.telephony.jitter_buffer import JitterBuffer
 from streaming.utils.state_manager import ExotelPhoneConversationStateManager
 
 
@@ -69,7 +79,8 @@ class ExotelPhoneConversation(AbstractPhoneConversation[ExotelOutputDevice]):
             base_url=base_url,
             config_manager=config_manager,
             output_device=ExotelOutputDevice(
-                convert_to_linear16=synthesizer_config.audio_encoding == AudioEncoding.MULAW
+                convert_to_linear16=synthesizer_config.audio_encoding == AudioEncoding.MULAW,
+                input_sampling_rate=synthesizer_config.sampling_rate,
             ),
             agent_config=agent_config,
             transcriber_config=transcriber_config,
@@ -95,7 +106,14 @@ class ExotelPhoneConversation(AbstractPhoneConversation[ExotelOutputDevice]):
         self.exotel_sid = exotel_sid
         self.record_call = record_call
         self.base_url = base_url
-        self.latest_media_timestamp = 0
+        self.jitter_buffer = JitterBuffer(
+            sampling_rate=DEFAULT_SAMPLING_RATE.value,
+            sample_width=SAMPLE_WIDTHS[EXOTEL_AUDIO_ENCODING],
+            silence=SILENCE_SAMPLES[EXOTEL_AUDIO_ENCODING],
+            frame_ms=EXOTEL_JITTER_BUFFER_FRAME_MS,
+            depth_ms=EXOTEL_JITTER_BUFFER_DEPTH_MS,
+            max_gap_ms=EXOTEL_JITTER_BUFFER_MAX_GAP_MS,
+        )
 
     def create_state_manager(self) -> ExotelPhoneConversationStateManager:
         return ExotelPhoneConversationStateManager(self)
@@ -137,24 +155,20 @@ class ExotelPhoneConversation(AbstractPhoneConversation[ExotelOutputDevice]):
         if message is None:
             return ExotelPhoneConversationWebsocketAction.CLOSE_WEBSOCKET
 
-        data = json.loads(message)
-        if data["event"] == "media":
-            media = data["media"]
-            chunk = base64.b64decode(media["payload"])
-            # if self.latest_media_timestamp + 20 < int(media["timestamp"]):
-            #     bytes_to_fill = 8 * (
-            #         int(media["timestamp"]) - (self.latest_media_timestamp + 20)
-            #     )
-            #     logger.debug(f"Filling {bytes_to_fill} bytes of silence")
-            #     # NOTE: 0xff is silence for mulaw audio
-            #     self.receive_audio(b"\xff" * bytes_to_fill)
-            self.latest_media_timestamp = int(media["timestamp"])
-            self.receive_audio(chunk)
+        data = decode_exotel_message(message)
+        if isinstance(data, ExotelMediaFrame):
+            for frame in self.jitter_buffer.push(data.timestamp, data.chunk):
+                self.receive_audio(frame)
+            return None
         if data["event"] == "mark":
             chunk_id = data["mark"]["name"]
             self.output_device.enqueue_mark_message(ChunkFinishedMarkMessage(chunk_id=chunk_id))
         elif data["event"] == "stop":
             logger.debug(f"Media WS: Received event 'stop': {message}")
+            for frame in self.jitter_buffer.flush():
+                self.receive_audio(frame)
+            logger.debug(f"Jitter buffer: {self.jitter_buffer.stats}")
+            logger.debug(f"Output pacing: {self.output_device.pacer.stats}")
             logger.debug("Stopping...")
             return ExotelPhoneConversationWebsocketAction.CLOSE_WEBSOCKET
         return None
@@ -0,0 +1,54 @@
+"""Encoding and decoding of the messages exchanged with Exotel over the media WebSocket.
+
+Media messages are sent for every audio chunk of every call, so their fixed parts are
+rendered once per stream and only the payload is encoded per message. Inbound media
+messages arrive every 20ms per call and are decoded without the stdlib json module.
+"""
+
+import binascii
+from typing import NamedTuple, Optional, Union
+
+import orjson
+
+
+class ExotelMediaFrame(NamedTuple):
+    timestamp: int
+    chunk: bytes
+
+
+def decode_exotel_message(message: Union[str, bytes]) -> Union[ExotelMediaFrame, dict]:
+    """Decode a media message into its audio and timestamp, any other message into its
+    dict. orjson parses a media message several times faster than json.loads, and
+    measured faster than scanning the text for the payload in Python."""
+    data = orjson.loads(message)
+    if data.get("event") == "media":
+        media = data["media"]
+        return ExotelMediaFrame(int(media["timestamp"]), binascii.a2b_base64(media["payload"]))
+    return data
+
+
+class ExotelMessageEncoder:
+    """Renders outbound messages for one stream. The JSON around the payload and the
+    mark name is precomputed with the stream_sid baked in, so a media message is one
+    base64 encoding and a concatenation, instead of building and dumping a dict."""
+
+    def __init__(self, stream_sid: Optional[str]):
+        self.stream_sid = stream_sid
+        stream_sid_json = orjson.dumps(stream_sid).decode()
+        self._media_prefix = (
+            f'{{"event":"media","stream_sid":{stream_sid_json},"media":{{"payload":"'
+        )
+        self._media_suffix = '"}}'
+        self._mark_prefix = f'{{"event":"mark","stream_sid":{stream_sid_json},"mark":{{"name":'
+        self._mark_suffix = "}}"
+        self._clear_message = orjson.dumps({"event": "clear", "stream_sid": stream_sid}).decode()
+
+    def media(self, chunk: bytes) -> str:
+        payload = binascii.b2a_base64(chunk, newline=False).decode("ascii")
+        return self._media_prefix + payload + self._media_suffix
+
+    def mark(self, name: str) -> str:
+        return self._mark_prefix + orjson.dumps(name).decode() + self._mark_suffix
+
+    def clear(self) -> str:
+        return self._clear_message
@@ -0,0 +1,128 @@
+"""Receive-side jitter buffer for the audio of one call.
+
+Exotel timestamps each inbound media message with its offset into the stream in
+milliseconds. Frames that arrive out of order are held until the frames before them
+arrive, frames that never arrive are replaced with silence once a frame timestamped
+the buffer's depth past the start of the gap has arrived, and the audio is handed on
+in fixed-size frames. Past the first `depth` of the stream, audio that arrives in order
+is passed through without waiting, so the transcriber only sees added latency while a
+gap is open. Time is measured by the timestamps of the frames received, so audio held
+for a gap is passed on when a later frame arrives, or on flush().
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class JitterBufferStats:
+    frames_received: int = 0
+    frames_reordered: int = 0
+    frames_dropped: int = 0
+    gaps_concealed: int = 0
+    bytes_concealed: int = 0
+
+
+class JitterBuffer:
+    def __init__(
+        self,
+        sampling_rate: int,
+        sample_width: int,
+        silence: bytes,
+        frame_ms: int = 20,
+        depth_ms: int = 60,
+        tolerance_ms: int = 2,
+        max_gap_ms: int = 1000,
+    ):
+        """`silence` is one sample of silence in the stream's encoding. Gaps and
+        overlaps up to `tolerance_ms` are treated as timestamp rounding, and at most
+        `max_gap_ms` of silence is inserted for one gap."""
+        self.bytes_per_ms = sampling_rate * sample_width // 1000
+        self.sample_width = sample_width
+        self.silence = silence
+        self.frame_size = frame_ms * self.bytes_per_ms
+        self.depth = depth_ms * self.bytes_per_ms
+        self.tolerance = tolerance_ms * self.bytes_per_ms
+        self.max_gap = max_gap_ms * self.bytes_per_ms
+        self.stats = JitterBufferStats()
+        # (position, arrival order, chunk), positions in bytes into the stream
+        self._pending: List[Tuple[int, int, bytes]] = []
+        self._latest = 0
+        self._position: Optional[int] = None
+        self._output = bytearray()
+        self._concealing = False
+
+    def push(self, timestamp: int, chunk: bytes) -> List[bytes]:
+        """Add a frame received with `timestamp`, returning the frames ready to be
+        passed on, each `frame_size` bytes long."""
+        self.stats.frames_received += 1
+        position = timestamp * self.bytes_per_ms
+        if self._position is not None and position + len(chunk) <= self._position:
+            # Duplicate, or arrived after its gap was concealed
+            self.stats.frames_dropped += 1
+            return []
+        if self._pending and position < self._latest - self.tolerance:
+            self.stats.frames_reordered += 1
+        heapq.heappush(self._pending, (position, self.stats.frames_received, chunk))
+        self._latest = max(self._latest, position)
+        self._drain(flush=False)
+        return self._frames(flush=False)
+
+    def flush(self) -> List[bytes]:
+        """Pass on everything buffered, concealing any open gaps and padding the last
+        frame with silence, e.g. when the stream stops."""
+        self._drain(flush=True)
+        return self._frames(flush=True)
+
+    def _drain(self, flush: bool):
+        if self._position is None and self._pending:
+            # The stream starts at the earliest frame received within the depth
+            if not flush and self._latest - self._pending[0][0] < self.depth:
+                return
+            self._position = self._pending[0][0]
+        while self._pending:
+            position, _, chunk = self._pending[0]
+            gap = position - self._position
+            if gap > self.tolerance:
+                # Missing audio is concealed once it is `depth` older than the latest frame
+                late_until = position if flush else min(position, self._latest - self.depth)
+                if late_until <= self._position:
+                    return
+                self._conceal(late_until - self._position)
+                self._position = late_until
+                if position - late_until > self.tolerance:
+                    return
+            heapq.heappop(self._pending)
+            offset = self._position - position
+            if offset > 0:
+                # Overlaps audio already passed on, keep whole samples of the rest
+                offset -= offset % self.sample_width
+                chunk = chunk[offset:]
+            self._output += chunk
+            self._concealing = False
+            self._position = max(self._position, position) + len(chunk)
+
+    def _conceal(self, gap: int):
+        size = min(gap - gap % self.sample_width, self.max_gap)
+        if not self._concealing:
+            self.stats.gaps_concealed += 1
+            self._concealing = True
+        self.stats.bytes_concealed += size
+        self._output += self.silence * (size // len(self.silence))
+
+    def _frames(self, flush: bool) -> List[bytes]:
+        output = self._output
+        if flush and len(output) % self.frame_size:
+            padding = self.frame_size - len(output) % self.frame_size
+            output += self.silence * (padding // len(self.silence))
+        count = len(output) // self.frame_size
+        if not count:
+            return []
+        end = count * self.frame_size
+        frames = [
+            bytes(output[start : start + self.frame_size])
+            for start in range(0, end, self.frame_size)
+        ]
+        del output[:end]
+        return frames
@@ -0,0 +1,119 @@
+"""Send-side pacing for the audio of one call.
+
+Synthesized audio arrives in chunks of whatever size the synthesizer produces, usually
+much faster than real time. FramePacer re-chunks it into fixed-duration frames and
+tracks when the audio sent so far finishes playing, so the sender can hold each frame
+until the lead over playback is within `max_lead`. Audio that was never sent can then
+be dropped on an interrupt, and what is already queued at the far end is bounded.
+
+Each chunk is tagged by the caller, and a frame reports the tags of the chunks that
+finish in it, so one mark can be sent per frame rather than per chunk.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Generic, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class PacingStats:
+    frames_sent: int = 0
+    chunks_sent: int = 0
+    chunks_dropped: int = 0
+    # Lead of the audio sent over playback when each frame is sent, in seconds
+    frame_lead_total: float = 0.0
+    frame_lead_max: float = 0.0
+    interrupts: int = 0
+    # Seconds from an interrupt to the clear message being sent
+    interrupt_latency_total: float = 0.0
+    interrupt_latency_max: float = 0.0
+
+    def record_frame(self, lead: float, chunks: int):
+        self.frames_sent += 1
+        self.chunks_sent += chunks
+        self.frame_lead_total += lead
+        self.frame_lead_max = max(self.frame_lead_max, lead)
+
+    def record_interrupt(self, latency: float):
+        self.interrupts += 1
+        self.interrupt_latency_total += latency
+        self.interrupt_latency_max = max(self.interrupt_latency_max, latency)
+
+    def __str__(self) -> str:
+        frame_lead = self.frame_lead_total / self.frames_sent if self.frames_sent else 0
+        interrupt_latency = (
+            self.interrupt_latency_total / self.interrupts if self.interrupts else 0
+        )
+        return (
+            f"{self.frames_sent} frames, {self.chunks_sent} chunks sent, "
+            f"{self.chunks_dropped} dropped, frame lead avg={frame_lead * 1000:.0f}ms "
+            f"max={self.frame_lead_max * 1000:.0f}ms, {self.interrupts} interrupts, "
+            f"latency avg={interrupt_latency * 1000:.1f}ms "
+            f"max={self.interrupt_latency_max * 1000:.1f}ms"
+        )
+
+
+class FramePacer(Generic[T]):
+    def __init__(self, bytes_per_second: int, frame_ms: int, max_lead_ms: int, sample_width: int):
+        self.bytes_per_second = bytes_per_second
+        self.frame_size = bytes_per_second * frame_ms // 1000
+        self.frame_duration = frame_ms / 1000
+        self.max_lead = max_lead_ms / 1000
+        self.sample_width = sample_width
+        self.stats = PacingStats()
+        self._buffer = bytearray()
+        # Tags of the buffered chunks, with the byte of the audio received where each ends
+        self._chunks: Deque[Tuple[T, int]] = deque()
+        self._bytes_received = 0
+        self._bytes_sent = 0
+        self._playback_end = 0.0
+
+    def __len__(self) -> int:
+        # Whole samples only, a trailing partial sample waits for the next chunk
+        return len(self._buffer) - len(self._buffer) % self.sample_width
+
+    def has_frame(self) -> bool:
+        return len(self._buffer) >= self.frame_size
+
+    def add(self, chunk: bytes, tag: T):
+        self._buffer += chunk
+        self._bytes_received += len(chunk)
+        self._chunks.append((tag, self._bytes_received))
+
+    def lead(self, now: float) -> float:
+        """Seconds of audio sent that have not been played yet."""
+        return max(self._playback_end - now, 0.0)
+
+    def delay(self, now: float) -> float:
+        """Seconds to wait before the next frame may be sent."""
+        return max(self.lead(now) - self.max_lead, 0.0)
+
+    def next_frame(self, now: float) -> Tuple[bytes, List[T]]:
+        """Take up to one frame of audio to send now, with the tags of the chunks that
+        finish in it. A short frame is cut to whole samples."""
+        size = min(self.frame_size, len(self._buffer))
+        size -= size % self.sample_width
+        frame = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self._bytes_sent += size
+        finished = []
+        while self._chunks and self._chunks[0][1] <= self._bytes_sent:
+            finished.append(self._chunks.popleft()[0])
+
+        lead = self.lead(now)
+        self._playback_end = now + lead + size / self.bytes_per_second
+        self.stats.record_frame(lead, len(finished))
+        return frame, finished
+
+    def clear(self, now: float) -> List[T]:
+        """Drop the audio not sent yet, returning the tags of its chunks. Playback of
+        what was sent is assumed to stop now."""
+        dropped = [tag for tag, _ in self._chunks]
+        self._buffer.clear()
+        self._chunks.clear()
+        self._bytes_sent = self._bytes_received
+        self._playback_end = now
+        self.stats.chunks_dropped += len(dropped)
+        return dropped
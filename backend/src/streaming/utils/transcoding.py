@@ -0,0 +1,86 @@
+"""Audio transcoding for telephony: mulaw <-> LINEAR16 and resampling of LINEAR16
+between the rates synthesizers and telephony providers use.
+
+The G.711 mulaw conversions are lookup tables built once with NumPy, matching audioop
+sample for sample, so a chunk is converted with one take() on the table. audioop is
+deprecated and removed in Python 3.13.
+"""
+
+from math import gcd
+
+import numpy as np
+
+SUPPORTED_SAMPLING_RATES = (8000, 16000, 24000)
+
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+
+
+def _build_ulaw_to_linear16() -> np.ndarray:
+    ulaw = ~np.arange(256, dtype=np.uint8)
+    magnitude = ((ulaw & 0x0F).astype(np.int32) << 3) + _ULAW_BIAS
+    magnitude <<= (ulaw & 0x70) >> 4
+    linear = np.where(ulaw & 0x80, _ULAW_BIAS - magnitude, magnitude - _ULAW_BIAS)
+    return linear.astype("<i2")
+
+
+def _build_linear16_to_ulaw() -> np.ndarray:
+    # Indexed by the sample's bits read as unsigned, audioop encodes the top 14 bits
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(samples), _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    segment = np.searchsorted(
+        np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude
+    )
+    ulaw = np.where(segment < 8, (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F), 0x7F)
+    return (ulaw ^ mask).astype(np.uint8)
+
+
+_ULAW_TO_LINEAR16 = _build_ulaw_to_linear16()
+_LINEAR16_TO_ULAW = _build_linear16_to_ulaw()
+
+
+def ulaw_to_linear16(chunk: bytes) -> bytes:
+    return _ULAW_TO_LINEAR16.take(np.frombuffer(chunk, dtype=np.uint8)).tobytes()
+
+
+def linear16_to_ulaw(chunk: bytes) -> bytes:
+    return _LINEAR16_TO_ULAW.take(np.frombuffer(chunk, dtype="<u2")).tobytes()
+
+
+class Resampler:
+    """Resamples a stream of LINEAR16 chunks by a rational factor: zero-stuffing,
+    a windowed-sinc low-pass filter and decimation. The filter history is carried
+    between chunks, so chunks can be of any length, and resampling a stream chunk by
+    chunk gives the same audio as resampling it at once. A trailing partial sample
+    waits for the next chunk."""
+
+    def __init__(self, from_rate: int, to_rate: int, zero_crossings: int = 16):
+        if from_rate not in SUPPORTED_SAMPLING_RATES or to_rate not in SUPPORTED_SAMPLING_RATES:
+            raise ValueError(f"Cannot resample from {from_rate}Hz to {to_rate}Hz")
+        divisor = gcd(from_rate, to_rate)
+        self.up = to_rate // divisor
+        self.down = from_rate // divisor
+
+        factor = max(self.up, self.down)
+        offsets = np.arange(-zero_crossings * factor, zero_crossings * factor + 1)
+        taps = np.sinc(offsets / factor) * np.blackman(len(offsets)) * self.up / factor
+        self._taps = taps
+        self._history = np.zeros(len(taps) - 1)
+        self._phase = 0
+        self._partial_sample = b""
+
+    def process(self, chunk: bytes) -> bytes:
+        if self._partial_sample:
+            chunk = self._partial_sample + chunk
+        whole_samples = len(chunk) // 2
+        self._partial_sample = chunk[whole_samples * 2 :]
+        samples = np.frombuffer(chunk, dtype="<i2", count=whole_samples)
+        upsampled = np.zeros(len(samples) * self.up)
+        upsampled[:: self.up] = samples
+        signal = np.concatenate((self._history, upsampled))
+        filtered = np.convolve(signal, self._taps, mode="valid")
+        output = filtered[self._phase :: self.down]
+        self._phase = (self._phase - len(filtered)) % self.down
+        self._history = signal[len(signal) - len(self._history) :]
+        return np.clip(np.rint(output), -32768, 32767).astype("<i2").tobytes()
@@ -1,8 +1,27 @@
 import asyncio
+from typing import Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the long-lived event loop of this process, creating it on first use"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def close_event_loop():
+    global _loop
+    if _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+        _loop.close()
+    _loop = None
 
 
 def async_to_sync(function, *args):
-    loop = asyncio.get_event_loop()
+    loop = get_event_loop()
     coroutine = function(*args)
-    loop.run_until_complete(coroutine)
-
+    return loop.run_until_complete(coroutine)
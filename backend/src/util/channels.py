@@ -0,0 +1,89 @@
+from redis.asyncio import Redis
+
+from config import CHANNEL_LEASE_DURATION, CHANNELS_AVAILABLE_COUNT
+from util.redis_client import REDIS_CLIENT
+
+CHANNEL_LEASES_KEY = "channel_leases"
+
+# Leases live in a sorted set scored by their expiry (ms, Redis server clock), so expired
+# leases of crashed workers are purged on every acquire and never hold a channel forever.
+# KEYS[1]: leases key, ARGV[1]: holder id, ARGV[2]: lease duration (ms), ARGV[3]: capacity
+ACQUIRE_LEASE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# Only extends a lease that is still live: an expired one is purged first, as its channel
+# may already have been handed out, and must be taken again through ACQUIRE.
+# KEYS[1]: leases key, ARGV[1]: holder id, ARGV[2]: lease duration (ms)
+REFRESH_LEASE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+class ChannelSemaphore:
+    """Distributed counting semaphore for telephony channels.
+
+    Every admission check and lease update runs as a single Lua script, so concurrent
+    workers can never admit more than `capacity` calls.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        capacity: int,
+        lease_duration: int,
+        key: str = CHANNEL_LEASES_KEY,
+    ):
+        self.redis = redis
+        self.capacity = capacity
+        self.lease_duration_ms = lease_duration * 1000
+        self.key = key
+        self._acquire_script = redis.register_script(ACQUIRE_LEASE_SCRIPT)
+        self._refresh_script = redis.register_script(REFRESH_LEASE_SCRIPT)
+
+    async def acquire(self, holder_id: str) -> bool:
+        acquired = await self._acquire_script(
+            keys=[self.key], args=[holder_id, self.lease_duration_ms, self.capacity]
+        )
+        return bool(acquired)
+
+    async def refresh(self, holder_id: str) -> bool:
+        refreshed = await self._refresh_script(
+            keys=[self.key], args=[holder_id, self.lease_duration_ms]
+        )
+        return bool(refreshed)
+
+    async def renew(self, holder_id: str) -> bool:
+        """Refresh the holder's lease, or acquire a new one within capacity when it has
+        expired or been released. False when the holder is left without a channel."""
+        return await self.refresh(holder_id) or await self.acquire(holder_id)
+
+    async def release(self, *holder_ids: str) -> None:
+        if holder_ids:
+            await self.redis.zrem(self.key, *holder_ids)
+
+    async def count(self) -> int:
+        seconds, microseconds = await self.redis.time()
+        now = seconds * 1000 + microseconds // 1000
+        return await self.redis.zcount(self.key, now, "+inf")
+
+
+CHANNEL_SEMAPHORE = ChannelSemaphore(
+    redis=REDIS_CLIENT,
+    capacity=CHANNELS_AVAILABLE_COUNT,
+    lease_duration=CHANNEL_LEASE_DURATION,
+)
@@ -0,0 +1,184 @@
+"""CSV parsing for customer set uploads.
+
+Everything here is plain Python without application imports, so ranges of a file can be
+parsed in worker processes.
+"""
+
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator, Optional, Tuple
+
+NON_DIGITS = re.compile(r"\D")
+
+# Stored mobile numbers are 10 digit national numbers, the telephony config adds the
+# country or trunk prefix when dialing
+MOBILE_NUMBER_LENGTH = 10
+COUNTRY_CODE = "91"
+TRUNK_PREFIX = "0"
+
+QUOTE = b'"'
+NEWLINE = b"\n"
+
+
+# (row number, name, mobile number, metadata as JSON)
+CustomerRecord = Tuple[int, str, str, str]
+
+
+@dataclass
+class ParsedCustomerRows:
+    """Result of parsing consecutive CSV rows.
+
+    Rows sharing a mobile number are merged into one customer, later values winning,
+    numbered by their last occurrence. Customers are plain tuples with the metadata
+    already serialized, as they are cheap to send back from a worker process and are
+    what COPY takes. `errors` holds (row number, reason, row)."""
+
+    row_count: int = 0
+    customers: list[CustomerRecord] = field(default_factory=list)
+    errors: list[Tuple[int, str, dict]] = field(default_factory=list)
+
+    def renumber(self, offset: int):
+        """Shift row numbers of a range parsed on its own to their position in the file"""
+        if offset:
+            self.customers = [
+                (row_number + offset, name, mobile_number, metadata)
+                for row_number, name, mobile_number, metadata in self.customers
+            ]
+            self.errors = [
+                (row_number + offset, error, row) for row_number, error, row in self.errors
+            ]
+
+
+def normalize_mobile_number(mobile_number: str) -> Optional[str]:
+    digits = NON_DIGITS.sub("", mobile_number)
+    if len(digits) == MOBILE_NUMBER_LENGTH + len(COUNTRY_CODE) and digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE) :]
+    elif len(digits) == MOBILE_NUMBER_LENGTH + len(TRUNK_PREFIX) and digits.startswith(
+        TRUNK_PREFIX
+    ):
+        digits = digits[len(TRUNK_PREFIX) :]
+    if len(digits) != MOBILE_NUMBER_LENGTH:
+        return None
+    return digits
+
+
+def validate_customer_row(row: dict) -> Optional[str]:
+    """Return why the row can't be loaded, stripping its name and normalizing its mobile
+    number otherwise"""
+    if None in row:
+        return "Row has more values than the header"
+    name = (row.get("name") or "").strip()
+    if not name:
+        return "Missing name"
+    row["name"] = name
+    if not (row.get("mobile_number") or "").strip():
+        return "Missing mobile_number"
+
+    mobile_number = normalize_mobile_number(row["mobile_number"])
+    if not mobile_number:
+        return "Invalid mobile_number"
+    row["mobile_number"] = mobile_number
+    return None
+
+
+def parse_customer_rows(rows: Iterable[Tuple[int, dict]]) -> ParsedCustomerRows:
+    parsed = ParsedCustomerRows()
+    customers: dict[str, Tuple[int, dict]] = {}
+    for row_number, row in rows:
+        parsed.row_count += 1
+        error = validate_customer_row(row)
+        if error:
+            parsed.errors.append((row_number, error, row))
+            continue
+
+        mobile_number = row["mobile_number"]
+        if mobile_number in customers:
+            customers[mobile_number] = (row_number, {**customers[mobile_number][1], **row})
+        else:
+            customers[mobile_number] = (row_number, row)
+
+    for mobile_number, (row_number, row) in customers.items():
+        name = row.pop("name")
+        del row["mobile_number"]
+        parsed.customers.append((row_number, name, mobile_number, json.dumps(row)))
+    return parsed
+
+
+def read_csv_chunks(file: IO[bytes], chunk_size: int) -> Iterator[list[Tuple[int, dict]]]:
+    """Parse the CSV incrementally into chunks of at most `chunk_size` numbered rows"""
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        csv_file = csv.DictReader(text_file)
+        rows = []
+        for row_number, row in enumerate(csv_file, start=1):
+            rows.append((row_number, row))
+            if len(rows) >= chunk_size:
+                yield rows
+                rows = []
+
+        if rows:
+            yield rows
+    finally:
+        text_file.detach()
+
+
+def count_csv_rows(file: IO[bytes]) -> int:
+    file.seek(0)
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        count = sum(1 for _ in csv.DictReader(text_file))
+    finally:
+        text_file.detach()
+    file.seek(0)
+    return count
+
+
+def split_csv_file(file: IO[bytes], range_size: int) -> Tuple[list[str], list[Tuple[int, int]]]:
+    """Split the file after its header into byte ranges of roughly `range_size` that end
+    on a row boundary, returning the header and the ranges.
+
+    A newline only ends a row when it is outside quotes. Quotes inside a quoted value are
+    doubled, so that is the case exactly when the number of quotes before it is even."""
+    file.seek(0)
+    header_line = file.readline()
+    fieldnames = next(csv.reader([header_line.decode("utf-8-sig")]))
+
+    ranges = []
+    start = file.tell()
+    quote_count = 0
+    while True:
+        block = file.read(range_size)
+        if not block:
+            break
+        quote_count += block.count(QUOTE)
+        if not block.endswith(NEWLINE) or quote_count % 2:
+            # Finish the current line, and keep going while inside a quoted value
+            while line := file.readline():
+                quote_count += line.count(QUOTE)
+                if quote_count % 2 == 0:
+                    break
+        end = file.tell()
+        ranges.append((start, end))
+        start = end
+
+    file.seek(0)
+    return fieldnames, ranges
+
+
+def parse_csv_range(path: str, start: int, end: int, fieldnames: list[str]) -> ParsedCustomerRows:
+    """Parse and validate the rows in a byte range of the file, numbered from 1"""
+    with open(path, "rb") as file:
+        file.seek(start)
+        content = file.read(end - start).decode("utf-8")
+    csv_file = csv.DictReader(io.StringIO(content, newline=""), fieldnames=fieldnames)
+    return parse_customer_rows(enumerate(csv_file, start=1))
+
+
+def count_csv_range(path: str, start: int, end: int) -> int:
+    with open(path, "rb") as file:
+        file.seek(start)
+        content = file.read(end - start).decode("utf-8")
+    return sum(1 for row in csv.reader(io.StringIO(content, newline="")) if row)
@@ -0,0 +1,59 @@
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi import Response
+
+from constants import CURSOR_SEPARATOR, CursorPrefix
+from exceptions import BadRequestException
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+PAGINATION_HEADERS = [NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, TOTAL_COUNT_HEADER]
+
+
+@dataclass
+class Cursor:
+    """Position in a list ordered by (created_at, id) descending. A NEXT cursor continues
+    after the entry, a PREV cursor goes back from it."""
+
+    prefix: CursorPrefix
+    created_at: datetime
+    id: str
+
+    def encode(self) -> str:
+        value = CURSOR_SEPARATOR.join([self.prefix.value, self.created_at.isoformat(), self.id])
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "Cursor":
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            prefix, created_at, id = value.split(CURSOR_SEPARATOR, 2)
+            return cls(CursorPrefix(prefix), datetime.fromisoformat(created_at), id)
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise BadRequestException(e, detail="Invalid cursor")
+
+
+@dataclass
+class Page(Generic[T]):
+    entries: List[T]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    count: Optional[int] = None
+
+
+def set_pagination_headers(response: Response, page: Page):
+    """List endpoints return the entries as the body, cursors and the total count go in
+    headers so existing clients keep working"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = page.prev_cursor
+    if page.count is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.count)
@@ -0,0 +1,3 @@
+from vocode.streaming.utils.redis import initialize_redis
+
+REDIS_CLIENT = initialize_redis()
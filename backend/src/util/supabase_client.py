@@ -0,0 +1,120 @@
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+from gotrue import AsyncMemoryStorage
+from storage3 import AsyncStorageClient
+from supabase._async.client import AsyncClient as SupabaseClient
+from supabase.lib.client_options import ClientOptions
+
+from config import (
+    STORAGE_UPLOAD_CHUNK_SIZE,
+    SUPABASE_KEEPALIVE_EXPIRY,
+    SUPABASE_KEY,
+    SUPABASE_MAX_CONNECTIONS,
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+    SUPABASE_URL,
+)
+from log import log
+
+SUPABASE_LIMITS = httpx.Limits(
+    max_connections=SUPABASE_MAX_CONNECTIONS,
+    max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+)
+
+
+class PooledStorageClient(AsyncStorageClient):
+    def _create_session(
+        self, base_url: str, headers: Dict[str, str], timeout: int, verify: bool = True
+    ) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=bool(verify),
+            follow_redirects=True,
+            http2=True,
+            limits=SUPABASE_LIMITS,
+        )
+
+
+class PooledSupabaseClient(SupabaseClient):
+    """Supabase client whose storage requests go through one bounded keep-alive pool.
+
+    It is shared by every request of a process, so it must only ever use the service
+    key: signing a user in on it would switch every later request to that session."""
+
+    @staticmethod
+    def _init_storage_client(
+        storage_url: str,
+        headers: Dict[str, str],
+        storage_client_timeout: int,
+        verify: bool = True,
+    ) -> AsyncStorageClient:
+        return PooledStorageClient(storage_url, headers, storage_client_timeout, verify)
+
+
+_supabase_client: Optional[PooledSupabaseClient] = None
+
+
+def get_supabase_client() -> PooledSupabaseClient:
+    global _supabase_client
+    if _supabase_client is None:
+        _supabase_client = PooledSupabaseClient(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            ClientOptions(
+                auto_refresh_token=False,
+                persist_session=False,
+                storage=AsyncMemoryStorage(),
+            ),
+        )
+        log.info("Supabase client initialized")
+    return _supabase_client
+
+
+async def close_supabase_client():
+    global _supabase_client
+    if _supabase_client is None:
+        return
+    if _supabase_client._storage is not None:
+        await _supabase_client._storage.aclose()
+    await _supabase_client.auth.close()
+    _supabase_client = None
+    log.info("Supabase client closed")
+
+
+async def upload_stream(
+    bucket: str,
+    path: str,
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    content_length: Optional[int] = None,
+    upsert: bool = False,
+) -> httpx.Response:
+    """Upload to storage from an iterator of chunks, so only one chunk is held in memory"""
+    headers = {"content-type": content_type, "x-upsert": "true" if upsert else "false"}
+    if content_length is not None:
+        headers["content-length"] = str(content_length)
+
+    storage = get_supabase_client().storage
+    response = await storage.session.post(
+        f"/object/{bucket}/{path}", content=chunks, headers=headers
+    )
+    response.raise_for_status()
+    return response
+
+
+async def download_stream(bucket: str, path: str) -> AsyncIterator[bytes]:
+    """Download from storage in chunks through the pooled session, reusing its connections"""
+    storage = get_supabase_client().storage
+    async with storage.session.stream("GET", f"/object/{bucket}/{path}") as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            yield chunk
+
+
+async def read_chunks(file, chunk_size: int = STORAGE_UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read an async file-like object, such as an UploadFile, in fixed-size chunks"""
+    while chunk := await file.read(chunk_size):
+        yield chunk
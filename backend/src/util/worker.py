@@ -0,0 +1,33 @@
+from vocode.streaming.utils.async_requester import AsyncRequestor
+
+from log import log
+from models.db import engine
+from util.asyncio import close_event_loop, get_event_loop
+from util.redis_client import REDIS_CLIENT
+from util.supabase_client import close_supabase_client, get_supabase_client
+
+
+def setup_worker_process():
+    """Create the resources a worker process keeps for its whole lifetime: one event loop
+    that every task runs on, and the pools hanging off it (database, HTTP, Redis, Supabase)"""
+    get_event_loop()
+    # Connections inherited from the parent process must not be reused after fork
+    engine.sync_engine.dispose(close=False)
+    get_supabase_client()
+    log.info("Worker process resources initialized")
+
+
+async def _close_resources():
+    await engine.dispose()
+    await AsyncRequestor().close_session()
+    await REDIS_CLIENT.aclose()
+    await close_supabase_client()
+
+
+def teardown_worker_process():
+    loop = get_event_loop()
+    try:
+        loop.run_until_complete(_close_resources())
+    finally:
+        close_event_loop()
+    log.info("Worker process resources closed")
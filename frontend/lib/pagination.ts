@@ -0,0 +1,25 @@
+import { requestOliveBackendWithAuth } from "@/lib/axios";
+
+// Axios lowercases response header names
+const NEXT_CURSOR_HEADER = "x-next-cursor";
+// Largest page the backend serves
+const PAGE_LIMIT = 500;
+
+// Lists every entry of a paginated endpoint, following X-Next-Cursor until the last page
+export const requestAllPages = async <T>(
+    url: string,
+    params: Record<string, string> = {}
+): Promise<T[]> => {
+    const entries: T[] = [];
+    let cursor: string | undefined;
+    do {
+        const response = await requestOliveBackendWithAuth({
+            url: url,
+            params: { ...params, limit: PAGE_LIMIT, ...(cursor ? { cursor: cursor } : {}) },
+            method: "GET"
+        });
+        entries.push(...response.data);
+        cursor = response.headers[NEXT_CURSOR_HEADER];
+    } while (cursor);
+    return entries;
+};
@@ -1,6 +1,7 @@
 import { useMutation, useQuery } from "@tanstack/react-query";
 
 import { requestOliveBackendWithAuth } from "@/lib/axios";
+import { requestAllPages } from "@/lib/pagination";
 import { queryClient } from "@/lib/query";
 import {
     Campaign,
@@ -19,8 +20,7 @@ export const CampaignService = {
         return response.data;
     },
     listCampaigns: async (): Promise<Campaign[]> => {
-        const response = await requestOliveBackendWithAuth({ url: `/campaigns`, method: "GET" });
-        return response.data;
+        return requestAllPages<Campaign>(`/campaigns`);
     },
     getCampaign: async (id: string): Promise<Campaign> => {
         const response = await requestOliveBackendWithAuth({
@@ -1,6 +1,7 @@
 import { useMutation, useQuery } from "@tanstack/react-query";
 
 import { requestOliveBackendWithAuth } from "@/lib/axios";
+import { requestAllPages } from "@/lib/pagination";
 import { queryClient } from "@/lib/query";
 import { Customer, CreateCustomer } from "@/types/customer";
 
@@ -14,11 +15,7 @@ export const CustomerService = {
         return response.data;
     },
     listCustomers: async (customerSetId: string): Promise<Customer[]> => {
-        const response = await requestOliveBackendWithAuth({
-            url: `/customers?customer_set_id=${customerSetId}`,
-            method: "GET"
-        });
-        return response.data;
+        return requestAllPages<Customer>(`/customers`, { customer_set_id: customerSetId });
     },
     getCustomer: async (id: string): Promise<Customer> => {
         const response = await requestOliveBackendWithAuth({
@@ -1,6 +1,7 @@
 import { useMutation, useQuery } from "@tanstack/react-query";
 
 import { requestOliveBackendWithAuth } from "@/lib/axios";
+import { requestAllPages } from "@/lib/pagination";
 import { queryClient } from "@/lib/query";
 import { CustomerSet } from "@/types/customer_set";
 
@@ -14,11 +15,7 @@ export const CustomerSetService = {
         return response.data;
     },
     listCustomerSets: async (): Promise<CustomerSet[]> => {
-        const response = await requestOliveBackendWithAuth({
-            url: `/customer-sets`,
-            method: "GET"
-        });
-        return response.data;
+        return requestAllPages<CustomerSet>(`/customer-sets`);
     },
     getCustomerSet: async (id: string): Promise<CustomerSet> => {
         const response = await requestOliveBackendWithAuth({